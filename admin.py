@@ -0,0 +1,45 @@
+from functools import wraps
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_current_user
+from src.utils.heavy_hitters import traffic_sketches
+
+admin_bp = Blueprint('admin', __name__)
+
+def admin_required(fn):
+    """Require a JWT whose user has the admin role"""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        user = get_current_user()
+        if not user or user.role != 'admin':
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Admin access required',
+                'code': 'ADMIN_REQUIRED'
+            }), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route('/admin/traffic', methods=['GET'])
+@admin_required
+def traffic_heavy_hitters():
+    """Get the heaviest senders, recipients and providers over a rolling window"""
+    try:
+        window = request.args.get('window', '5m')
+        if window not in traffic_sketches.WINDOWS:
+            return jsonify({
+                'error': 'Validation Error',
+                'message': f'window must be one of: {", ".join(traffic_sketches.WINDOWS)}',
+                'code': 'INVALID_WINDOW'
+            }), 400
+        
+        limit = request.args.get('limit', traffic_sketches.k, type=int)
+        
+        return jsonify(traffic_sketches.top(window, limit)), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal Server Error',
+            'message': 'An error occurred while collecting traffic statistics',
+            'code': 'TRAFFIC_ERROR'
+        }), 500
@@ -12,7 +12,7 @@ const api = axios.create({
 api.interceptors.request.use(
   (config) => {
     const token = localStorage.getItem('access_token');
-    if (token) {
+    if (token && !config.headers.Authorization) {
       config.headers.Authorization = `Bearer ${token}`;
     }
     return config;
@@ -22,29 +22,58 @@ api.interceptors.request.use(
   }
 );
 
+// Refresh tokens are single use, so concurrent 401s must not each spend the
+// same one: the first starts the refresh and the rest await the same promise
+let refreshPromise = null;
+
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) {
+      return Promise.reject(new Error('No refresh token'));
+    }
+    refreshPromise = axios.post('/api/auth/refresh', {}, {
+      headers: { Authorization: `Bearer ${refreshToken}` },
+    })
+      .then((response) => {
+        // Store the rotated refresh token along with the new access token
+        const { access_token, refresh_token } = response.data;
+        setAuthTokens(access_token, refresh_token);
+        return access_token;
+      })
+      .catch((refreshError) => {
+        // Another tab may have rotated the token first; use what it stored
+        if (localStorage.getItem('refresh_token') !== refreshToken) {
+          return localStorage.getItem('access_token');
+        }
+        throw refreshError;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Response interceptor to handle token refresh
 api.interceptors.response.use(
   (response) => response,
   async (error) => {
     const originalRequest = error.config;
 
-    if (error.response?.status === 401 && !originalRequest._retry) {
+    if (error.response?.status === 401 && !originalRequest._retry && localStorage.getItem('refresh_token')) {
       originalRequest._retry = true;
 
       try {
-        const refreshToken = localStorage.getItem('refresh_token');
-        if (refreshToken) {
-          const response = await axios.post('/api/auth/refresh', {
-            refresh_token: refreshToken,
-          });
-
-          const { access_token } = response.data;
-          localStorage.setItem('access_token', access_token);
-
-          // Retry the original request with new token
-          originalRequest.headers.Authorization = `Bearer ${access_token}`;
-          return api(originalRequest);
-        }
+        // Sent before a refresh that has since finished: just retry with the new token
+        const currentToken = localStorage.getItem('access_token');
+        const accessToken = currentToken && originalRequest.headers.Authorization !== `Bearer ${currentToken}`
+          ? currentToken
+          : await refreshAccessToken();
+
+        // Retry the original request with new token
+        originalRequest.headers.Authorization = `Bearer ${accessToken}`;
+        return api(originalRequest);
       } catch (refreshError) {
         // Refresh failed, redirect to login
         localStorage.removeItem('access_token');
@@ -61,8 +90,9 @@ api.interceptors.response.use(
 export const authAPI = {
   register: (userData) => api.post('/auth/register', userData),
   login: (credentials) => api.post('/auth/login', credentials),
-  refresh: (refreshToken) => api.post('/auth/refresh', { refresh_token: refreshToken }),
-  logout: () => api.post('/auth/logout'),
+  refresh: (refreshToken) => api.post('/auth/refresh', {}, { headers: { Authorization: `Bearer ${refreshToken}` } }),
+  logout: () => api.post('/auth/logout', { refresh_token: localStorage.getItem('refresh_token') }),
+  logoutAll: () => api.post('/auth/logout-all'),
   getProfile: () => api.get('/auth/profile'),
   updateProfile: (userData) => api.put('/auth/profile', userData),
 };
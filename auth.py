@@ -1,11 +1,26 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt, get_current_user, decode_token
 from datetime import datetime, timedelta
 import re
 from src.models.user import User, db
+from src.models.user_session import UserSession
+from src.utils.password_hasher import password_hasher, HasherBusy
+from src.utils.identity_cache import identity_cache
+from src.utils.token_revocation import token_revocation
 
 auth_bp = Blueprint('auth', __name__)
 
+REFRESH_TOKEN_LIFETIME = timedelta(days=30)
+
+def issue_refresh_token(user_id):
+    """Create a refresh token; returns (token, jti, expires_at)"""
+    refresh_token = create_refresh_token(
+        identity=str(user_id),
+        expires_delta=REFRESH_TOKEN_LIFETIME
+    )
+    claims = decode_token(refresh_token)
+    return refresh_token, claims['jti'], datetime.utcfromtimestamp(claims['exp'])
+
 def validate_email(email):
     """Validate email format"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -27,6 +42,14 @@ def validate_password(password):
     
     return True, "Password is valid"
 
+def auth_busy_response():
+    """Response for when the password hashing pool is saturated"""
+    return jsonify({
+        'error': 'Service Unavailable',
+        'message': 'Authentication service is busy, please retry shortly',
+        'code': 'AUTH_BUSY'
+    }), 503, {'Retry-After': '1'}
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -74,13 +97,15 @@ def register():
                 'code': 'EMAIL_EXISTS'
             }), 409
         
-        # Create new user
-        user = User.create_user(
+        # Hash on the bounded bcrypt pool, then create the user
+        user = User(
             email=email,
-            password=password,
+            password_hash=password_hasher.hash(password),
             first_name=first_name if first_name else None,
             last_name=last_name if last_name else None
         )
+        db.session.add(user)
+        db.session.commit()
         
         return jsonify({
             'message': 'User registered successfully',
@@ -88,6 +113,8 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HasherBusy:
+        return auth_busy_response()
     except Exception as e:
         return jsonify({
             'error': 'Internal Server Error',
@@ -114,7 +141,7 @@ def login():
         
         # Find user by email
         user = User.find_by_email(email)
-        if not user or not user.check_password(password):
+        if not user or not password_hasher.verify(password, user.password_hash):
             return jsonify({
                 'error': 'Authentication Failed',
                 'message': 'Invalid email or password',
@@ -129,18 +156,28 @@ def login():
                 'code': 'ACCOUNT_DEACTIVATED'
             }), 401
         
+        # Upgrade the hash if the configured bcrypt cost has changed;
+        # committed together with the last login update below
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(password)
+        
         # Update last login
         user.update_last_login()
         
-        # Create JWT tokens
+        # Create JWT tokens and record the refresh token's session
         access_token = create_access_token(
-            identity=user.id,
+            identity=str(user.id),
             expires_delta=timedelta(hours=1)
         )
-        refresh_token = create_refresh_token(
-            identity=user.id,
-            expires_delta=timedelta(days=30)
+        refresh_token, jti, expires_at = issue_refresh_token(user.id)
+        UserSession.create(
+            user_id=user.id,
+            jti=jti,
+            expires_at=expires_at,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
         )
+        db.session.commit()
         
         return jsonify({
             'access_token': access_token,
@@ -149,6 +186,8 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HasherBusy:
+        return auth_busy_response()
     except Exception as e:
         return jsonify({
             'error': 'Internal Server Error',
@@ -159,27 +198,36 @@ def login():
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh():
-    """Refresh access token using refresh token"""
+    """Refresh access token and rotate the refresh token"""
     try:
-        current_user_id = get_jwt_identity()
+        invalid_response = jsonify({
+            'error': 'Authentication Failed',
+            'message': 'Invalid or expired refresh token',
+            'code': 'INVALID_REFRESH_TOKEN'
+        }), 401
         
-        # Verify user still exists and is active
-        user = User.query.get(current_user_id)
+        # Verify user still exists and is active (cached snapshot, no DB query)
+        user = get_current_user()
         if not user or not user.is_active:
-            return jsonify({
-                'error': 'Authentication Failed',
-                'message': 'Invalid or expired refresh token',
-                'code': 'INVALID_REFRESH_TOKEN'
-            }), 401
+            return invalid_response
+        
+        # Rotate the session in one indexed UPDATE; a used, revoked or
+        # expired refresh token matches no row
+        refresh_token, jti, expires_at = issue_refresh_token(user.id)
+        if not UserSession.rotate(user.id, get_jwt()['jti'], jti, expires_at):
+            db.session.rollback()
+            return invalid_response
+        db.session.commit()
         
         # Create new access token
         access_token = create_access_token(
-            identity=user.id,
+            identity=str(user.id),
             expires_delta=timedelta(hours=1)
         )
         
         return jsonify({
             'access_token': access_token,
+            'refresh_token': refresh_token,
             'expires_in': 3600
         }), 200
         
@@ -193,19 +241,63 @@ def refresh():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout user (client-side token removal)"""
-    # In a production environment, you might want to blacklist the token
-    # For now, we'll just return a success message
-    return jsonify({
-        'message': 'Successfully logged out'
-    }), 200
+    """Logout user by revoking the current access token and refresh session"""
+    try:
+        token = get_jwt()
+        token_revocation.revoke(token['jti'], token['exp'])
+        
+        # End the refresh session too when the client sends its refresh token
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token'):
+            try:
+                claims = decode_token(data['refresh_token'])
+            except Exception:
+                claims = None
+            if claims and str(claims.get('sub')) == str(token['sub']):
+                UserSession.revoke(claims['jti'])
+                db.session.commit()
+        
+        return jsonify({
+            'message': 'Successfully logged out'
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal Server Error',
+            'message': 'An error occurred during logout',
+            'code': 'LOGOUT_ERROR'
+        }), 500
+
+@auth_bp.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """Logout user everywhere by ending all refresh sessions"""
+    try:
+        token = get_jwt()
+        token_revocation.revoke(token['jti'], token['exp'])
+        
+        ended = UserSession.revoke_all(int(get_jwt_identity()))
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Successfully logged out of all sessions',
+            'sessions_ended': ended
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': 'Internal Server Error',
+            'message': 'An error occurred during logout',
+            'code': 'LOGOUT_ERROR'
+        }), 500
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     """Get current user profile"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         user = User.query.get(current_user_id)
         
         if not user:
@@ -231,7 +323,7 @@ def get_profile():
 def update_profile():
     """Update current user profile"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         user = User.query.get(current_user_id)
         
         if not user:
@@ -273,6 +365,7 @@ def update_profile():
             user.email_verified = False  # Reset verification status
         
         db.session.commit()
+        identity_cache.invalidate(user.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
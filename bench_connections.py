@@ -0,0 +1,75 @@
+"""ConnectionRegistry benchmark.
+
+Simulates sockets connecting, joining rooms, being looked up and
+disconnecting, at several connection counts, and reports the cost per
+operation. The registry's operations are O(1), so the per-operation cost
+at 10k connections should stay close to the cost at 1k:
+
+    python bench_connections.py --connections 1000 10000
+"""
+import argparse
+import time
+from src.realtime.connection_registry import ConnectionRegistry
+
+OPERATIONS = ('connect', 'join', 'lookup', 'user_lookup', 'disconnect')
+
+def run(connections, tabs_per_user=2):
+    """Get {operation: microseconds per call} for one population size"""
+    registry = ConnectionRegistry()
+    users = max(connections // tabs_per_user, 1)
+    sids = [f'sid-{i}' for i in range(connections)]
+    timings = {}
+
+    start = time.perf_counter()
+    for i, sid in enumerate(sids):
+        registry.register(sid, i // tabs_per_user % users + 1)
+    timings['connect'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, sid in enumerate(sids):
+        registry.add_room(sid, f'phone_{i % 5000}')
+    timings['join'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for sid in sids:
+        registry.get_user_id(sid)
+    timings['lookup'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for user_id in range(1, connections + 1):
+        registry.get_sids(user_id % users + 1)
+    timings['user_lookup'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for sid in sids:
+        registry.unregister(sid)
+    timings['disconnect'] = time.perf_counter() - start
+
+    assert registry.connection_count() == 0 and registry.room_count() == 0
+    return {name: seconds / connections * 1e6 for name, seconds in timings.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ConnectionRegistry operations by connection count')
+    parser.add_argument('--connections', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--tabs', type=int, default=2, help='sockets each simulated user has open')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per size; the fastest is reported')
+    parser.add_argument('--max-growth', type=float, default=3.0,
+                        help='fail if an operation gets this many times slower from the smallest to the largest size')
+    args = parser.parse_args()
+
+    results = {}
+    print(f'{"connections":>12}' + ''.join(f'{name + " us":>16}' for name in OPERATIONS))
+    for connections in args.connections:
+        runs = [run(connections, args.tabs) for _ in range(args.repeat)]
+        results[connections] = {name: min(r[name] for r in runs) for name in OPERATIONS}
+        print(f'{connections:>12}' + ''.join(f'{results[connections][name]:>16.3f}' for name in OPERATIONS))
+
+    smallest, largest = results[min(results)], results[max(results)]
+    growth = {name: largest[name] / smallest[name] for name in OPERATIONS}
+    print('growth ' + ', '.join(f'{name} x{value:.2f}' for name, value in growth.items()))
+    ok = all(value <= args.max_growth for value in growth.values())
+    print('PASS' if ok else 'FAIL')
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Logins per second by bcrypt pool size.
+
+Many client threads verify passwords at once, as a login spike would,
+against a PasswordHasher configured with each pool size. Reports
+verifications per second, latency and how many calls were turned away
+with HasherBusy, plus how long a trivial request waits meanwhile:
+
+    python bench_password_hasher.py --pool-sizes 1 2 4 8 --rounds 12
+"""
+import argparse
+import os
+import threading
+import time
+import bcrypt
+from flask import Flask
+from src.utils.password_hasher import HasherBusy, PasswordHasher
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run(pool_size, max_pending, rounds, clients, duration):
+    app = Flask(__name__)
+    app.config.update(BCRYPT_ROUNDS=rounds, BCRYPT_POOL_SIZE=pool_size, BCRYPT_MAX_PENDING=max_pending)
+    hasher = PasswordHasher(app)
+    password_hash = bcrypt.hashpw(b'Passw0rdOK', bcrypt.gensalt(rounds)).decode()
+
+    latencies = []
+    busy = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                hasher.verify('Passw0rdOK', password_hash)
+            except HasherBusy:
+                with lock:
+                    busy[0] += 1
+                time.sleep(0.01)  # a client retrying after a 503
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    # A request that needs no hashing, sampled while logins are running
+    other = []
+    def other_requests():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            sum(range(1000))
+            other.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    threads.append(threading.Thread(target=other_requests))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    hasher._executor.shutdown()
+
+    return {
+        'logins_per_sec': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'busy': busy[0],
+        'other_p99_ms': percentile(other, 0.99) * 1000
+    }
+
+def main():
+    cpus = os.cpu_count() or 2
+    parser = argparse.ArgumentParser(description='Measure login throughput for several bcrypt pool sizes')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=sorted({1, 2, cpus, cpus * 2}))
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent login attempts')
+    parser.add_argument('--max-pending', type=int, help='queue bound (default 4 x pool size)')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per pool size')
+    args = parser.parse_args()
+
+    print(f'{cpus} CPUs, bcrypt cost {args.rounds}, {args.clients} concurrent clients')
+    print(f'{"pool":>5} {"logins/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"busy":>6} {"other p99 ms":>13}')
+    for pool_size in args.pool_sizes:
+        result = run(pool_size, args.max_pending or pool_size * 4, args.rounds, args.clients, args.duration)
+        print(f'{pool_size:>5} {result["logins_per_sec"]:>9.1f} {result["p50_ms"]:>8.1f} {result["p99_ms"]:>8.1f} '
+              f'{result["busy"]:>6} {result["other_p99_ms"]:>13.2f}')
+
+if __name__ == '__main__':
+    main()
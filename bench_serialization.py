@@ -0,0 +1,123 @@
+"""JSON vs compact notification encoding benchmark.
+
+Builds and encodes representative message and number status
+notifications in both formats, the way SocketManager does for each room
+fan-out, and reports bytes and CPU per 1k notifications:
+
+    python bench_serialization.py --notifications 1000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from src.realtime import compact
+from src.realtime.serializer import PreSerialized
+
+def sample_notifications(count, seed=1):
+    """Mix of new message (90%) and number status (10%) notification inputs"""
+    rng = random.Random(seed)
+    start = datetime(2026, 10, 19, 6, 0, 0)
+    samples = []
+    for i in range(count):
+        at = start + timedelta(milliseconds=rng.randrange(3600000))
+        if rng.random() < 0.9:
+            samples.append(('message', {
+                'id': 100000 + i,
+                'phone_number_id': rng.randrange(1, 5000),
+                'phone_number': f'+1415555{rng.randrange(10000):04d}',
+                'sender_number': f'+1202555{rng.randrange(10000):04d}',
+                'message_content': rng.choice([
+                    f'Your verification code is {rng.randrange(1000000):06d}',
+                    f'{rng.randrange(1000000):06d} is your login code. Do not share it.',
+                    'Your order has shipped and will arrive tomorrow between 9am and 5pm.'
+                ]),
+                'message_type': rng.choice(['sms', 'otp', 'verification']),
+                'received_at': at.isoformat(),
+                'is_read': False
+            }))
+        else:
+            samples.append(('status', {
+                'id': rng.randrange(1, 5000),
+                'phone_number': f'+1415555{rng.randrange(10000):04d}',
+                'status': rng.choice(['assigned', 'available']),
+                'expires_at': (at + timedelta(hours=1)).isoformat(),
+                'assigned_at': at.isoformat()
+            }))
+    return samples
+
+def encode_json(seq, kind, data):
+    # Same payload shapes as SocketManager._send_new_message / _send_number_status_change
+    if kind == 'message':
+        payload = PreSerialized({
+            'type': 'new_message',
+            'seq': seq,
+            'message': {
+                'id': data.get('id'),
+                'phone_number': data.get('phone_number'),
+                'sender_number': data.get('sender_number'),
+                'message_content': data.get('message_content'),
+                'message_type': data.get('message_type'),
+                'received_at': data.get('received_at'),
+                'is_read': data.get('is_read', False)
+            },
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    else:
+        payload = PreSerialized({
+            'type': 'number_status_change',
+            'seq': seq,
+            'phone_number': {
+                'id': data.get('id'),
+                'phone_number': data.get('phone_number'),
+                'status': data.get('status'),
+                'expires_at': data.get('expires_at'),
+                'assigned_at': data.get('assigned_at')
+            },
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    return len(payload.text.encode('utf-8'))
+
+def encode_compact(seq, kind, data):
+    if kind == 'message':
+        payload = compact.compact_message(seq, data)
+    else:
+        payload = compact.compact_number_status(seq, data)
+    return len(payload.data)
+
+def measure(encode, samples, repeat):
+    """Get (bytes per notification, CPU microseconds per notification), fastest of repeat runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        size = 0
+        for seq, (kind, data) in enumerate(samples):
+            size += encode(seq, kind, data)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return size / len(samples), best / len(samples) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON and compact notification encoding')
+    parser.add_argument('--notifications', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per format; the fastest is reported')
+    args = parser.parse_args()
+
+    if not compact.is_available():
+        raise SystemExit('msgpack is not installed')
+
+    samples = sample_notifications(args.notifications)
+    results = {
+        'json': measure(encode_json, samples, args.repeat),
+        'compact': measure(encode_compact, samples, args.repeat)
+    }
+
+    scale = 1000
+    print(f'{"format":>8} {"bytes/notif":>12} {"KiB/1k":>9} {"ms CPU/1k":>10}')
+    for name, (size, cpu_us) in results.items():
+        print(f'{name:>8} {size:>12.1f} {size * scale / 1024:>9.1f} {cpu_us * scale / 1000:>10.2f}')
+    json_size, json_cpu = results['json']
+    compact_size, compact_cpu = results['compact']
+    print(f'compact is {compact_size / json_size:.0%} of the JSON size and {compact_cpu / json_cpu:.0%} of its CPU')
+
+if __name__ == '__main__':
+    main()
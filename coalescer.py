@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from src.realtime.serializer import PreSerialized
+from src.realtime.compact import CompactPayload, encode_compact_batch
+
+# Rooms whose last emit is older than this many windows are forgotten
+_PRUNE_AFTER_ROOMS = 10000
+
+def encode_batch(items):
+    """Build a message_batch payload from (event, payload) pairs without re-encoding them"""
+    if isinstance(items[0][1], CompactPayload):
+        return encode_compact_batch(items)
+    return PreSerialized.from_text(
+        '{"count":%d,"notifications":[%s]}' % (
+            len(items),
+            ','.join(
+                '{"event":%s,"data":%s}' % (json.dumps(event), payload.text)
+                for event, payload in items
+            )
+        )
+    )
+
+class NotificationCoalescer:
+    """Per-room buffering of notification bursts.
+
+    The first notification for a quiet room is emitted immediately. Any
+    further notifications for that room within ``window`` seconds are held
+    and sent together as a single ``message_batch`` event when the window
+    closes, so a burst costs one emit per room instead of one per message.
+    Payloads are PreSerialized and the batch is assembled from their cached
+    text, so each notification is encoded to JSON exactly once. Emits that
+    skip different sets of sids are buffered separately.
+    """
+
+    batch_event = 'message_batch'
+
+    def __init__(self, emit, start_background_task, sleep, window=0.025, max_batch=100):
+        self._emit = emit
+        self._start_background_task = start_background_task
+        self._sleep = sleep
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = {}  # (room, skip_sids) -> [(event, PreSerialized)]
+        self._last_emit = {}  # (room, skip_sids) -> monotonic time of last emit
+
+    def submit(self, room, event, payload, skip_sid=None):
+        """Emit now if the room is quiet, otherwise buffer until the window closes"""
+        if not isinstance(payload, (PreSerialized, CompactPayload)):
+            payload = PreSerialized(payload)
+
+        key = (room, tuple(sorted(skip_sid)) if skip_sid else None)
+
+        if self.window <= 0:
+            self._send(key, [(event, payload)])
+            return
+
+        flush_now = None
+        schedule = False
+        with self._lock:
+            now = time.monotonic()
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.append((event, payload))
+                if len(pending) >= self.max_batch:
+                    flush_now = self._pending.pop(key)
+                    self._last_emit[key] = now
+            else:
+                last = self._last_emit.get(key)
+                if last is None or now - last >= self.window:
+                    self._last_emit[key] = now
+                    flush_now = [(event, payload)]
+                else:
+                    self._pending[key] = [(event, payload)]
+                    schedule = True
+
+            if len(self._last_emit) > _PRUNE_AFTER_ROOMS:
+                self._prune(now)
+
+        if flush_now:
+            self._send(key, flush_now)
+        if schedule:
+            self._start_background_task(self._flush_later, key)
+
+    def _flush_later(self, key):
+        self._sleep(self.window)
+        with self._lock:
+            items = self._pending.pop(key, None)
+            if items:
+                self._last_emit[key] = time.monotonic()
+        if items:
+            self._send(key, items)
+
+    def _send(self, key, items):
+        room, skip_sids = key
+        skip_sid = list(skip_sids) if skip_sids else None
+        if len(items) == 1:
+            event, payload = items[0]
+            self._emit(event, payload, room=room, skip_sid=skip_sid)
+            return
+
+        self._emit(self.batch_event, encode_batch(items), room=room, skip_sid=skip_sid)
+
+    def _prune(self, now):
+        horizon = now - self.window
+        stale = [key for key, last in self._last_emit.items()
+                 if last < horizon and key not in self._pending]
+        for key in stale:
+            del self._last_emit[key]
+
+    def pending_count(self):
+        """Get the number of notifications currently buffered"""
+        with self._lock:
+            return sum(len(items) for items in self._pending.values())
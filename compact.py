@@ -0,0 +1,97 @@
+from datetime import datetime
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - compact encoding is optional
+    msgpack = None
+
+# Room suffix for sockets that negotiated the compact binary format
+COMPACT_ROOM_SUFFIX = '~c'
+
+# Short codes for event names and message types in compact payloads
+EVENT_CODES = {
+    'message_notification': 'm',
+    'number_status_notification': 'n'
+}
+MESSAGE_TYPE_CODES = {
+    'sms': 's',
+    'otp': 'o',
+    'verification': 'v'
+}
+
+def is_available():
+    """Check if the msgpack package is installed"""
+    return msgpack is not None
+
+def compact_room(room):
+    """Get the compact-format twin of a room"""
+    return room + COMPACT_ROOM_SUFFIX
+
+def to_epoch_ms(value):
+    """Convert a datetime or ISO 8601 string to integer epoch milliseconds"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    return int((value - datetime(1970, 1, 1)).total_seconds() * 1000)
+
+class CompactPayload:
+    """A notification encoded once to MessagePack, sent as a binary attachment"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, obj):
+        self.data = msgpack.packb(obj, use_bin_type=True)
+
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, state):
+        self.data = state
+
+def compact_message(seq, message_data):
+    """Compact schema for message_notification"""
+    return CompactPayload({
+        's': seq,
+        'i': message_data.get('id'),
+        'p': message_data.get('phone_number_id'),
+        'n': message_data.get('phone_number'),
+        'f': message_data.get('sender_number'),
+        'c': message_data.get('message_content'),
+        'k': MESSAGE_TYPE_CODES.get(message_data.get('message_type'), message_data.get('message_type')),
+        'r': to_epoch_ms(message_data.get('received_at')),
+        'u': bool(message_data.get('is_read', False))
+    })
+
+def compact_number_status(seq, phone_number_data):
+    """Compact schema for number_status_notification"""
+    return CompactPayload({
+        's': seq,
+        'i': phone_number_data.get('id'),
+        'n': phone_number_data.get('phone_number'),
+        'st': phone_number_data.get('status'),
+        'x': to_epoch_ms(phone_number_data.get('expires_at')),
+        'a': to_epoch_ms(phone_number_data.get('assigned_at'))
+    })
+
+def _array_header(length):
+    if length < 16:
+        return bytes([0x90 | length])
+    if length < 0x10000:
+        return b'\xdc' + length.to_bytes(2, 'big')
+    return b'\xdd' + length.to_bytes(4, 'big')
+
+def encode_compact_batch(items):
+    """Build a batch as a MessagePack array of [event_code, payload] pairs.
+
+    Item payloads are spliced in as already-encoded bytes rather than
+    decoded and packed again.
+    """
+    parts = [_array_header(len(items))]
+    for event, payload in items:
+        parts.append(b'\x92')
+        parts.append(msgpack.packb(EVENT_CODES.get(event, event)))
+        parts.append(payload.data)
+    batch = CompactPayload.__new__(CompactPayload)
+    batch.data = b''.join(parts)
+    return batch
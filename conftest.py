@@ -0,0 +1,33 @@
+import os
+import tempfile
+import pytest
+
+# Test configuration, read by src.main when it is first imported
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('SPOOL_DIR', tempfile.mkdtemp(prefix='disposms-spool-'))
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+@pytest.fixture
+def app():
+    from src.main import app, db
+    from src.models.inventory_counts import inventory_counts
+    from src.models.lease_store import lease_store
+    from src.models.phone_number import PhoneNumber
+    from src.models.prefix_index import prefix_index
+    from src.utils.identity_cache import identity_cache
+
+    with app.app_context():
+        db.create_all()
+        # Process-wide caches start from the empty database
+        identity_cache.clear()
+        lease_store.backend.clear()
+        inventory_counts.reconcile()
+        prefix_index.reconcile(PhoneNumber.get_cooldown())
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,123 @@
+from datetime import datetime
+import threading
+
+class ConnectionRegistry:
+    """Thread-safe index of live socket connections.
+
+    Keeps sid -> connection info and user_id -> set(sids) so that lookups
+    by socket or by user are O(1) and a user may hold several sockets
+    (one per open tab) at the same time. User ids are keyed by their string
+    form, since JWT subjects arrive as strings while model ids are ints.
+    Room membership is tracked as room -> set(sids) so emitters can tell
+    in O(1) whether a room has anyone in it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._connections = {}  # sid -> {'user_id', 'connected_at', 'compact', 'rooms'}
+        self._user_sids = {}  # str(user_id) -> set(sid)
+        self._room_sids = {}  # room -> set(sid)
+
+    def register(self, sid, user_id, compact=False):
+        """Record a new connection for a user"""
+        with self._lock:
+            self._connections[sid] = {
+                'user_id': user_id,
+                'connected_at': datetime.utcnow().isoformat(),
+                'compact': compact,
+                'rooms': set()
+            }
+            self._user_sids.setdefault(str(user_id), set()).add(sid)
+
+    def unregister(self, sid):
+        """Forget a connection, returning its info or None if it was unknown"""
+        with self._lock:
+            info = self._connections.pop(sid, None)
+            if info is None:
+                return None
+            key = str(info['user_id'])
+            sids = self._user_sids.get(key)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._user_sids[key]
+            for room in info['rooms']:
+                self._discard_member(room, sid)
+            return info
+
+    def get_user_id(self, sid):
+        """Get the user id for a socket id"""
+        info = self._connections.get(sid)
+        return info['user_id'] if info else None
+
+    def is_compact(self, sid):
+        """Check if a socket negotiated the compact binary format"""
+        info = self._connections.get(sid)
+        return bool(info and info['compact'])
+
+    def get_sids(self, user_id):
+        """Get a snapshot of the socket ids open for a user"""
+        with self._lock:
+            return set(self._user_sids.get(str(user_id), ()))
+
+    def add_room(self, sid, room):
+        """Record that a socket joined a room"""
+        with self._lock:
+            info = self._connections.get(sid)
+            if info is not None:
+                info['rooms'].add(room)
+                self._room_sids.setdefault(room, set()).add(sid)
+
+    def remove_room(self, sid, room):
+        """Record that a socket left a room"""
+        with self._lock:
+            info = self._connections.get(sid)
+            if info is not None:
+                info['rooms'].discard(room)
+                self._discard_member(room, sid)
+
+    def _discard_member(self, room, sid):
+        sids = self._room_sids.get(room)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._room_sids[room]
+
+    def room_has_members(self, room):
+        """Check if any socket on this process is in a room"""
+        return room in self._room_sids
+
+    def room_count(self):
+        """Get the number of rooms with at least one socket"""
+        return len(self._room_sids)
+
+    def get_rooms(self, sid):
+        """Get a snapshot of the rooms a socket is in"""
+        with self._lock:
+            info = self._connections.get(sid)
+            return set(info['rooms']) if info else set()
+
+    def is_user_connected(self, user_id):
+        """Check if a user has at least one open socket"""
+        return str(user_id) in self._user_sids
+
+    def get_user_connections(self, user_id):
+        """Get info for every socket a user has open"""
+        with self._lock:
+            return [
+                {
+                    'socket_id': sid,
+                    'connected_at': self._connections[sid]['connected_at'],
+                    'compact': self._connections[sid]['compact'],
+                    'rooms': sorted(self._connections[sid]['rooms'])
+                }
+                for sid in self._user_sids.get(str(user_id), ())
+            ]
+
+    def user_count(self):
+        """Get the number of distinct connected users"""
+        return len(self._user_sids)
+
+    def connection_count(self):
+        """Get the number of open sockets"""
+        return len(self._connections)
@@ -0,0 +1,141 @@
+from collections import OrderedDict
+import itertools
+import logging
+import threading
+import time
+from src.realtime.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+class NotificationDispatcher:
+    """Bounded queue of notification emits drained by a background worker.
+
+    Request threads enqueue and return immediately, so webhook latency no
+    longer includes socket fan-out. Work submitted with a merge key replaces
+    any queued work with the same key (only the latest state is sent).
+    When the queue is full the overflow policy drops either the oldest
+    queued item or the incoming one, calling that item's on_drop so the
+    caller can record what was lost.
+    """
+
+    def __init__(self, max_size=10000, overflow='drop_oldest'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unsupported overflow policy: {overflow}')
+        self.max_size = max_size
+        self.overflow = overflow
+        self._queue = OrderedDict()  # key -> (fn, args, enqueued_at, on_drop)
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._running = False
+        self.emit_latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self._stats = {
+            'enqueued': 0,
+            'processed': 0,
+            'merged': 0,
+            'dropped': 0,
+            'errors': 0,
+            'max_depth': 0
+        }
+
+    def start(self, start_background_task):
+        """Start the worker using the server's background task primitive"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        start_background_task(self._run)
+
+    def stop(self):
+        """Ask the worker to exit once the queue is drained"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    @property
+    def running(self):
+        return self._running
+
+    def submit(self, fn, *args, merge_key=None, on_drop=None):
+        """Queue fn(*args); runs inline when the worker is not started.
+        
+        on_drop(*args) is called if the overflow policy discards the item.
+        """
+        if not self._running:
+            self._call(fn, args)
+            return
+
+        dropped = None
+        with self._condition:
+            key = merge_key if merge_key is not None else ('seq', next(self._sequence))
+            if key in self._queue:
+                _, _, enqueued_at, _ = self._queue[key]
+                self._queue[key] = (fn, args, enqueued_at, on_drop)
+                self._stats['merged'] += 1
+                return
+
+            accepted = True
+            if len(self._queue) >= self.max_size:
+                self._stats['dropped'] += 1
+                if self.overflow == 'drop_newest':
+                    accepted = False
+                    dropped = (on_drop, args)
+                else:
+                    _, (_, dropped_args, _, dropped_on_drop) = self._queue.popitem(last=False)
+                    dropped = (dropped_on_drop, dropped_args)
+
+            if accepted:
+                self._queue[key] = (fn, args, time.perf_counter(), on_drop)
+                self._stats['enqueued'] += 1
+                if len(self._queue) > self._stats['max_depth']:
+                    self._stats['max_depth'] = len(self._queue)
+                self._condition.notify()
+
+        # Outside the lock: the handler may take locks of its own
+        if dropped is not None and dropped[0] is not None:
+            dropped_on_drop, dropped_args = dropped
+            try:
+                dropped_on_drop(*dropped_args)
+            except Exception as e:
+                logger.error(f'Notification drop handler error: {str(e)}')
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait(timeout=1.0)
+                if not self._queue:
+                    return
+                _, (fn, args, enqueued_at, _) = self._queue.popitem(last=False)
+
+            self.queue_wait.observe(time.perf_counter() - enqueued_at)
+            self._call(fn, args)
+
+    def _call(self, fn, args):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.error(f'Notification dispatch error: {str(e)}')
+        finally:
+            self.emit_latency.observe(time.perf_counter() - start)
+            self._stats['processed'] += 1
+
+    def depth(self):
+        """Get the number of queued notifications"""
+        return len(self._queue)
+
+    def get_metrics(self):
+        """Get queue depth, counters and latency histograms"""
+        with self._condition:
+            metrics = dict(self._stats)
+            metrics['depth'] = len(self._queue)
+        metrics['capacity'] = self.max_size
+        metrics['overflow_policy'] = self.overflow
+        metrics['running'] = self._running
+        metrics['emit_latency'] = self.emit_latency.snapshot()
+        metrics['queue_wait'] = self.queue_wait.snapshot()
+        return metrics
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+import threading
+import time
+
+FLOOD_POLICIES = ('summarize', 'drop')
+
+# check() outcomes
+ALLOW = 'allow'
+SUMMARIZE = 'summarize'
+DROP = 'drop'
+
+class FloodGuard:
+    """Per-(sender, recipient) message rate limits on the ingest path.
+
+    Each pair keeps a sliding window estimate from two fixed windows (the
+    previous window's count weighted by how much of it still overlaps,
+    plus the current count), so a check is O(1) and a pair costs a few
+    integers. Pairs are kept in LRU order and capped at ``max_pairs``.
+
+    Once a pair exceeds ``max_messages`` per ``window`` seconds its
+    messages are suppressed before any insert or notification. With the
+    ``summarize`` policy the first suppressed message of each window is
+    replaced by a single summary message; the rest, and everything under
+    the ``drop`` policy, are discarded and counted. Counters are
+    per process.
+
+    Spooled webhooks are checked again when replayed, against their
+    arrival time and in pairs of their own: a backlog is throttled as it
+    would have been on arrival, however fast it drains, without the
+    messages counted on receipt being counted twice.
+    """
+
+    def __init__(self, window=60, max_messages=20, policy='summarize', max_pairs=50000):
+        if policy not in FLOOD_POLICIES:
+            raise ValueError(f'Unsupported flood policy: {policy}')
+        self.window = window
+        self.max_messages = max_messages
+        self.policy = policy
+        self.max_pairs = max_pairs
+        self._lock = threading.Lock()
+        self._pairs = OrderedDict()  # (sender, recipient) -> [window_index, previous, current, flood_window]
+        self._replayed = OrderedDict()  # same, for replayed messages by arrival time
+        self._stats = {
+            'allowed': 0,
+            'summarized': 0,
+            'dropped': 0,
+            'flood_events': 0,
+            'evicted': 0
+        }
+
+    def init_app(self, app):
+        policy = app.config.get('FLOOD_POLICY', self.policy)
+        if policy not in FLOOD_POLICIES:
+            raise ValueError(f'Unsupported flood policy: {policy}')
+        self.policy = policy
+        self.window = app.config.get('FLOOD_WINDOW_SECONDS', self.window)
+        self.max_messages = app.config.get('FLOOD_MAX_MESSAGES', self.max_messages)
+        self.max_pairs = app.config.get('FLOOD_MAX_TRACKED_PAIRS', self.max_pairs)
+
+    def check(self, sender_number, recipient_number, received_at=None):
+        """Count one message and decide: ALLOW, SUMMARIZE or DROP.
+
+        received_at is the arrival time of a replayed message; live
+        messages are counted at the current time.
+        """
+        if not self.max_messages or self.max_messages <= 0:
+            return ALLOW
+
+        key = (sender_number, recipient_number)
+        if received_at is None:
+            pairs = self._pairs
+            now = time.time()
+        else:
+            pairs = self._replayed
+            now = received_at
+        index = int(now // self.window)
+
+        with self._lock:
+            entry = pairs.get(key)
+            if entry is None:
+                entry = pairs[key] = [index, 0, 0, None]
+                if len(pairs) > self.max_pairs:
+                    pairs.popitem(last=False)
+                    self._stats['evicted'] += 1
+            else:
+                pairs.move_to_end(key)
+                if entry[0] < index:
+                    entry[1] = entry[2] if entry[0] == index - 1 else 0
+                    entry[2] = 0
+                    entry[0] = index
+                elif entry[0] > index:
+                    # Older than the pair's window (another worker's segment, or
+                    # the clock stepping back): count it in that window
+                    index = entry[0]
+
+            overlap = 1.0 - (now % self.window) / self.window
+            estimate = entry[1] * overlap + entry[2]
+            # Suppressed messages still count, so a sustained flood stays throttled
+            entry[2] += 1
+
+            if estimate < self.max_messages:
+                self._stats['allowed'] += 1
+                return ALLOW
+
+            if entry[3] != index:
+                entry[3] = index
+                self._stats['flood_events'] += 1
+                if self.policy == 'summarize':
+                    self._stats['summarized'] += 1
+                    return SUMMARIZE
+
+            self._stats['dropped'] += 1
+            return DROP
+
+    def summary_text(self, sender_number):
+        """Content of the message that stands in for a suppressed flood"""
+        return (
+            f'[Flood protection] {sender_number} sent more than {self.max_messages} '
+            f'messages in {self.window} seconds; further messages from this sender '
+            f'are being suppressed.'
+        )
+
+    def get_stats(self):
+        """Get counters, configuration and the number of pairs flooding right now"""
+        index = int(time.time() // self.window)
+        with self._lock:
+            stats = dict(self._stats)
+            stats['tracked_pairs'] = len(self._pairs)
+            stats['active_floods'] = sum(1 for entry in self._pairs.values() if entry[3] == index)
+        stats['policy'] = self.policy
+        stats['window_seconds'] = self.window
+        stats['max_messages'] = self.max_messages
+        return stats
+
+# Global flood guard instance
+flood_guard = FloodGuard()
@@ -0,0 +1,209 @@
+from array import array
+import heapq
+import math
+import random
+import threading
+import time
+
+# Modulus of the row hash family ((a * x + b) mod p) mod width
+MERSENNE_PRIME = (1 << 61) - 1
+
+class CountMinSketch:
+    """Count-Min Sketch: approximate counts in fixed memory.
+
+    With width = ceil(e / epsilon) and depth = ceil(ln(1 / delta)), an
+    estimate is never below the true count and exceeds it by at most
+    epsilon * total with probability at least 1 - delta. The bound needs
+    each row's hash drawn independently from a pairwise independent
+    family, so rows use random (a, b) over hash(key).
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = int(math.ceil(math.e / epsilon))
+        self.depth = int(math.ceil(math.log(1.0 / delta)))
+        self._hashes = [
+            (random.randrange(1, MERSENNE_PRIME), random.randrange(MERSENNE_PRIME))
+            for _ in range(self.depth)
+        ]
+        self._rows = [array('q', bytes(8 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+
+    def _columns(self, key):
+        x = hash(key) % MERSENNE_PRIME
+        width = self.width
+        return [(a * x + b) % MERSENNE_PRIME % width for a, b in self._hashes]
+
+    def add(self, key, count=1):
+        """Add count to key and return its new estimate"""
+        estimate = None
+        for i, row in zip(self._columns(key), self._rows):
+            row[i] += count
+            if estimate is None or row[i] < estimate:
+                estimate = row[i]
+        self.total += count
+        return estimate
+
+    def estimate(self, key):
+        return min(row[i] for i, row in zip(self._columns(key), self._rows))
+
+    def clear(self):
+        self._rows = [array('q', bytes(8 * self.width)) for _ in range(self.depth)]
+        self.total = 0
+
+class HeavyHitters:
+    """Count-Min Sketch plus the k keys with the highest estimates"""
+
+    def __init__(self, k=20, epsilon=0.001, delta=0.01):
+        self.k = k
+        self.sketch = CountMinSketch(epsilon, delta)
+        self._top = {}  # key -> estimate, at most k entries
+        self._heap = []  # (estimate, key) min-heap over _top, with stale entries
+
+    def add(self, key, count=1):
+        estimate = self.sketch.add(key, count)
+        if key in self._top or len(self._top) < self.k:
+            self._top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        else:
+            # Discard stale heap entries until the minimum is current
+            while self._heap and self._top.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if self._heap and estimate > self._heap[0][0]:
+                _, evicted = heapq.heappop(self._heap)
+                del self._top[evicted]
+                self._top[key] = estimate
+                heapq.heappush(self._heap, (estimate, key))
+
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(estimate, key) for key, estimate in self._top.items()]
+            heapq.heapify(self._heap)
+
+    def candidates(self):
+        return self._top.keys()
+
+    def clear(self):
+        self.sketch.clear()
+        self._top.clear()
+        self._heap.clear()
+
+class RollingHeavyHitters:
+    """Heavy hitters over a rolling window split into ``slots`` sub-windows.
+
+    Each slot has its own sketch; the oldest is cleared as the window
+    advances. A query merges the slots' top-k candidates and sums their
+    per-slot estimates, so it costs O(slots * k * depth) regardless of
+    traffic. Estimates keep the Count-Min guarantee against the window
+    total: never low, and high by at most epsilon * total per slot summed,
+    i.e. epsilon * window total. A window estimate fails if any slot's
+    does, so each slot's sketch is built for delta / slots and the union
+    bound over the slots gives probability 1 - delta for the window.
+    """
+
+    def __init__(self, window_seconds, slots, k=20, epsilon=0.001, delta=0.01):
+        self.window_seconds = window_seconds
+        self.slot_seconds = window_seconds / slots
+        self._slots = [HeavyHitters(k, epsilon, delta / slots) for _ in range(slots)]
+        self._slot_index = [None] * slots  # absolute slot number each slot holds
+
+    def _slot(self, now):
+        index = int(now // self.slot_seconds)
+        position = index % len(self._slots)
+        if self._slot_index[position] != index:
+            self._slots[position].clear()
+            self._slot_index[position] = index
+        return self._slots[position]
+
+    def add(self, key, now, count=1):
+        self._slot(now).add(key, count)
+
+    def _live_slots(self, now):
+        oldest = int(now // self.slot_seconds) - len(self._slots) + 1
+        return [
+            slot for slot, index in zip(self._slots, self._slot_index)
+            if index is not None and index >= oldest
+        ]
+
+    def top(self, now, n):
+        """Get (total, [(key, estimate)]) for the n heaviest keys in the window"""
+        live = self._live_slots(now)
+        candidates = set()
+        for slot in live:
+            candidates.update(slot.candidates())
+        estimates = [
+            (key, sum(slot.sketch.estimate(key) for slot in live))
+            for key in candidates
+        ]
+        total = sum(slot.sketch.total for slot in live)
+        return total, heapq.nlargest(n, estimates, key=lambda item: item[1])
+
+class TrafficSketches:
+    """Streaming heavy hitters for inbound SMS senders, recipients and providers.
+
+    Updated once per received webhook and queried by the admin traffic
+    endpoint, replacing GROUP BY scans over messages. Memory is fixed by
+    epsilon, delta, k and the window layout, not by traffic. Counts are
+    per worker process.
+    """
+
+    DIMENSIONS = ('sender', 'recipient', 'provider')
+
+    # name -> (window seconds, slots)
+    WINDOWS = {
+        '5m': (300, 5),
+        '1h': (3600, 6)
+    }
+
+    def __init__(self, k=20, epsilon=0.001, delta=0.01):
+        self.configure(k, epsilon, delta)
+
+    def configure(self, k=20, epsilon=0.001, delta=0.01):
+        self.k = k
+        self.epsilon = epsilon
+        self.delta = delta
+        self._lock = threading.Lock()
+        self._sketches = {
+            (dimension, window): RollingHeavyHitters(seconds, slots, k, epsilon, delta)
+            for dimension in self.DIMENSIONS
+            for window, (seconds, slots) in self.WINDOWS.items()
+        }
+
+    def init_app(self, app):
+        self.configure(
+            app.config.get('TRAFFIC_TOP_K', self.k),
+            app.config.get('TRAFFIC_SKETCH_EPSILON', self.epsilon),
+            app.config.get('TRAFFIC_SKETCH_DELTA', self.delta)
+        )
+
+    def record(self, sender_number, recipient_number, provider_name):
+        """Count one inbound message"""
+        now = time.time()
+        keys = {'sender': sender_number, 'recipient': recipient_number, 'provider': provider_name}
+        with self._lock:
+            for (dimension, _), sketch in self._sketches.items():
+                sketch.add(keys[dimension], now)
+
+    def top(self, window='5m', n=None):
+        """Get the heaviest keys per dimension for one window with error bounds"""
+        n = min(n or self.k, self.k)
+        now = time.time()
+        result = {}
+        with self._lock:
+            for dimension in self.DIMENSIONS:
+                total, top = self._sketches[(dimension, window)].top(now, n)
+                result[dimension] = {
+                    'total': total,
+                    'max_overcount': int(math.ceil(self.epsilon * total)),
+                    'top': [{'key': key, 'count': count} for key, count in top]
+                }
+        return {
+            'window': window,
+            'window_seconds': self.WINDOWS[window][0],
+            'epsilon': self.epsilon,
+            'confidence': 1 - self.delta,
+            'dimensions': result
+        }
+
+# Global traffic sketches instance
+traffic_sketches = TrafficSketches()
@@ -0,0 +1,69 @@
+from collections import OrderedDict, namedtuple
+import threading
+import time
+
+# Compact view of a user for authenticated requests
+UserSnapshot = namedtuple('UserSnapshot', ['id', 'email', 'role', 'is_active'])
+
+class IdentityCache:
+    """Per-process user id -> UserSnapshot cache with a TTL.
+
+    Backs the JWT user_lookup_loader so authenticated requests can check a
+    user's existence, role and active flag without a database round trip.
+    Entries are dropped on profile updates and deactivation in this
+    process; other workers pick up changes when the TTL expires.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # str(user_id) -> (expires_at, UserSnapshot or None)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('IDENTITY_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('IDENTITY_CACHE_SIZE', self.max_size)
+
+    @staticmethod
+    def snapshot(user):
+        """Build a snapshot from a User model instance"""
+        return UserSnapshot(
+            id=user.id,
+            email=user.email,
+            role=getattr(user, 'role', 'user'),
+            is_active=user.is_active
+        )
+
+    def get(self, user_id):
+        """Get a user snapshot, loading it from the database on a miss"""
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        from src.models.user import User
+        user = User.query.get(user_id)
+        snapshot = self.snapshot(user) if user else None
+
+        with self._lock:
+            # Missing users are cached too so bogus ids don't hit the database
+            self._entries[key] = (now + self.ttl, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        """Drop a user's cached snapshot"""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Global identity cache instance
+identity_cache = IdentityCache()
@@ -0,0 +1,113 @@
+from array import array
+import threading
+import time
+
+# name -> (seconds per bucket, buckets kept)
+RESOLUTIONS = {
+    '1s': (1, 60),
+    '1m': (60, 60),
+    '1h': (3600, 24)
+}
+
+class RingSeries:
+    """Fixed-size ring of time buckets holding count, failures and latency"""
+
+    def __init__(self, resolution, length):
+        self.resolution = resolution
+        self.length = length
+        self._index = array('q', [-1] * length)  # absolute bucket number in each slot
+        self._count = array('q', [0] * length)
+        self._failures = array('q', [0] * length)
+        self._latency_sum = array('d', [0.0] * length)
+        self._latency_max = array('d', [0.0] * length)
+
+    def record(self, now, failed, latency_ms):
+        index = int(now // self.resolution)
+        slot = index % self.length
+        if self._index[slot] != index:
+            self._index[slot] = index
+            self._count[slot] = 0
+            self._failures[slot] = 0
+            self._latency_sum[slot] = 0.0
+            self._latency_max[slot] = 0.0
+        self._count[slot] += 1
+        if failed:
+            self._failures[slot] += 1
+        self._latency_sum[slot] += latency_ms
+        if latency_ms > self._latency_max[slot]:
+            self._latency_max[slot] = latency_ms
+
+    def points(self, now):
+        """Get buckets oldest first, with empty buckets for periods without traffic"""
+        newest = int(now // self.resolution)
+        points = []
+        for index in range(newest - self.length + 1, newest + 1):
+            slot = index % self.length
+            if self._index[slot] == index:
+                count = self._count[slot]
+                points.append({
+                    't': index * self.resolution,
+                    'count': count,
+                    'failures': self._failures[slot],
+                    'avg_ms': round(self._latency_sum[slot] / count, 3) if count else 0.0,
+                    'max_ms': round(self._latency_max[slot], 3)
+                })
+            else:
+                points.append({'t': index * self.resolution, 'count': 0, 'failures': 0, 'avg_ms': 0.0, 'max_ms': 0.0})
+        return points
+
+class IngestSeries:
+    """Per-provider webhook ingest counts, failures and latency over time.
+
+    Each provider has one ring per resolution: 60 x 1s, 60 x 1m and
+    24 x 1h. Every webhook is added to all three, so the coarser series
+    are the finer ones downsampled at write time and the current bucket
+    of each is exact. Memory is fixed per provider; provider names past
+    ``max_providers`` are pooled under ``other``. Series are per worker
+    process.
+    """
+
+    def __init__(self, max_providers=32):
+        self.max_providers = max_providers
+        self._lock = threading.Lock()
+        self._providers = {}  # provider name -> {resolution name: RingSeries}
+
+    def _series_for(self, provider_name):
+        series = self._providers.get(provider_name)
+        if series is None:
+            if len(self._providers) >= self.max_providers:
+                provider_name = 'other'
+                series = self._providers.get(provider_name)
+            if series is None:
+                series = self._providers[provider_name] = {
+                    name: RingSeries(resolution, length)
+                    for name, (resolution, length) in RESOLUTIONS.items()
+                }
+        return series
+
+    def record(self, provider_name, failed, latency_seconds):
+        """Add one processed webhook"""
+        now = time.time()
+        latency_ms = latency_seconds * 1000.0
+        with self._lock:
+            for ring in self._series_for(provider_name).values():
+                ring.record(now, failed, latency_ms)
+
+    def snapshot(self, resolutions=None):
+        """Get {provider: {resolution: {'resolution_seconds', 'points'}}}"""
+        now = time.time()
+        resolutions = resolutions or list(RESOLUTIONS)
+        with self._lock:
+            return {
+                provider_name: {
+                    name: {
+                        'resolution_seconds': series[name].resolution,
+                        'points': series[name].points(now)
+                    }
+                    for name in resolutions
+                }
+                for provider_name, series in self._providers.items()
+            }
+
+# Global ingest series instance
+ingest_series = IngestSeries()
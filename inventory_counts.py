@@ -0,0 +1,134 @@
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+import threading
+import time
+from src.models.user import db
+
+# How often the in-memory counts are rebuilt from the phone_numbers table
+DEFAULT_RECONCILE_INTERVAL_SECONDS = 60
+
+class InventoryCounts:
+    """In-memory phone number counts per (status, country_code).
+
+    Kept up to date by assign, release, expiry and import so that
+    GET /api/numbers can report `total` without a COUNT(*) per page.
+    Released numbers still in their cooldown are tracked in per-country
+    queues ordered by release time, so the rotation-visible available count
+    is the available count minus the cooling queue length. Counts are
+    periodically reconciled against the table to absorb writes made by
+    other workers.
+    """
+
+    def __init__(self, reconcile_interval=DEFAULT_RECONCILE_INTERVAL_SECONDS):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)  # (status, country_code) -> count
+        self._cooling = defaultdict(deque)  # country_code -> deque of released_at
+        self._last_reconciled = None
+
+    def is_stale(self):
+        """Check if the counts are due for reconciliation"""
+        if self._last_reconciled is None:
+            return True
+        return time.monotonic() - self._last_reconciled >= self.reconcile_interval
+
+    def reconcile(self):
+        """Rebuild counts from the phone_numbers table"""
+        from src.models.phone_number import PhoneNumber
+
+        rows = db.session.query(
+            PhoneNumber.status,
+            PhoneNumber.country_code,
+            db.func.count(PhoneNumber.id)
+        ).group_by(PhoneNumber.status, PhoneNumber.country_code).all()
+
+        cutoff = datetime.utcnow() - PhoneNumber.get_cooldown()
+        cooling_rows = db.session.query(
+            PhoneNumber.country_code,
+            PhoneNumber.released_at
+        ).filter(
+            PhoneNumber.status == 'available',
+            PhoneNumber.released_at > cutoff
+        ).order_by(PhoneNumber.released_at.asc()).all()
+
+        counts = defaultdict(int)
+        for status, country_code, count in rows:
+            counts[(status, country_code)] = count
+
+        cooling = defaultdict(deque)
+        for country_code, released_at in cooling_rows:
+            cooling[country_code].append(released_at)
+
+        with self._lock:
+            self._counts = counts
+            self._cooling = cooling
+            self._last_reconciled = time.monotonic()
+
+    def record_transition(self, country_code, old_status, new_status, released_at=None):
+        """Move one number from old_status to new_status"""
+        with self._lock:
+            if old_status:
+                self._counts[(old_status, country_code)] = max(self._counts[(old_status, country_code)] - 1, 0)
+            self._counts[(new_status, country_code)] += 1
+            if released_at is not None:
+                self._cooling[country_code].append(released_at)
+
+    def record_added(self, country_code, status, count=1):
+        """Account for newly imported numbers"""
+        with self._lock:
+            self._counts[(status, country_code)] += count
+
+    def _expire_cooling(self, cooldown):
+        cutoff = datetime.utcnow() - cooldown
+        expired = 0
+        for queue in self._cooling.values():
+            while queue and queue[0] <= cutoff:
+                queue.popleft()
+                expired += 1
+        return expired
+
+    def expire_cooling(self, cooldown):
+        """Reclassify released numbers whose cooldown has passed as ready; returns how many"""
+        with self._lock:
+            return self._expire_cooling(cooldown)
+
+    def get_total(self, status, country_code=None, cooldown=None):
+        """Get the number of phone numbers with a status (any status when None), optionally per country.
+
+        When a cooldown is given, available numbers still cooling down are
+        excluded to match the ready queue.
+        """
+        if self.is_stale():
+            self.reconcile()
+
+        with self._lock:
+            if status is None:
+                total = sum(
+                    count for (_, c), count in self._counts.items()
+                    if not country_code or c == country_code
+                )
+            elif country_code:
+                total = self._counts.get((status, country_code), 0)
+            else:
+                total = sum(count for (s, _), count in self._counts.items() if s == status)
+
+            if status == 'available' and cooldown is not None:
+                self._expire_cooling(cooldown)
+                if country_code:
+                    cooling = len(self._cooling.get(country_code, ()))
+                else:
+                    cooling = sum(len(queue) for queue in self._cooling.values())
+                total = max(total - cooling, 0)
+
+        return total
+
+    def snapshot(self):
+        """Get a copy of the current counts keyed by status then country"""
+        with self._lock:
+            result = defaultdict(dict)
+            for (status, country_code), count in self._counts.items():
+                result[status][country_code] = count
+            return dict(result)
+
+# Global inventory counts instance
+inventory_counts = InventoryCounts()
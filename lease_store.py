@@ -0,0 +1,147 @@
+from collections import namedtuple
+from datetime import datetime
+import logging
+import threading
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional for local development
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Active assignment of a phone number: who holds it and until when (naive UTC)
+Lease = namedtuple('Lease', ['user_id', 'expires_at'])
+
+def _to_timestamp(dt):
+    return (dt - datetime(1970, 1, 1)).total_seconds()
+
+def _from_timestamp(ts):
+    return datetime.utcfromtimestamp(ts)
+
+class MemoryLeaseBackend:
+    """Process-local lease backend.
+
+    Leases are only visible to the current process, so this backend is meant
+    for single-worker deployments, development and tests.
+    """
+
+    def __init__(self):
+        self._leases = {}  # phone_number_id -> Lease
+        self._lock = threading.Lock()
+
+    def get(self, phone_number_id):
+        with self._lock:
+            lease = self._leases.get(phone_number_id)
+            if lease and lease.expires_at <= datetime.utcnow():
+                del self._leases[phone_number_id]
+                return None
+            return lease
+
+    def put(self, phone_number_id, lease):
+        with self._lock:
+            self._leases[phone_number_id] = lease
+
+    def delete(self, phone_number_id):
+        with self._lock:
+            self._leases.pop(phone_number_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._leases.clear()
+
+class RedisLeaseBackend:
+    """Redis lease backend shared by every worker, expiring leases with native key TTLs"""
+
+    key_prefix = 'lease:number:'
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError('The redis package is required for a redis:// lease store')
+        self.client = redis.Redis.from_url(url)
+
+    def _key(self, phone_number_id):
+        return f'{self.key_prefix}{phone_number_id}'
+
+    def get(self, phone_number_id):
+        value = self.client.get(self._key(phone_number_id))
+        if value is None:
+            return None
+        user_id, expires_ts = value.decode().split('|', 1)
+        return Lease(int(user_id), _from_timestamp(float(expires_ts)))
+
+    def put(self, phone_number_id, lease):
+        expires_ts = _to_timestamp(lease.expires_at)
+        self.client.set(
+            self._key(phone_number_id),
+            f'{lease.user_id}|{expires_ts}',
+            exat=max(int(expires_ts), 1)
+        )
+
+    def delete(self, phone_number_id):
+        self.client.delete(self._key(phone_number_id))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f'{self.key_prefix}*'))
+        if keys:
+            self.client.delete(*keys)
+
+class LeaseStore:
+    """Fast number -> (user_id, expires_at) lookups for active assignments.
+
+    The phone_numbers table remains the source of truth; the lease store is
+    written through on assign, extend and release and lets ownership checks
+    skip the database. Only a lease naming the caller is trusted: a missing
+    lease, or one held by someone else, is confirmed against the database.
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryLeaseBackend()
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Select the backend from LEASE_STORE_URL (memory:// or redis://...)"""
+        url = app.config.get('LEASE_STORE_URL', 'memory://')
+        if url.startswith('redis://') or url.startswith('rediss://'):
+            self.backend = RedisLeaseBackend(url)
+        else:
+            # A process-local lease outlives a release or reassignment made by
+            # another worker, so it would keep granting the old owner access
+            if app.config.get('WEB_CONCURRENCY', 1) > 1:
+                raise RuntimeError('LEASE_STORE_URL=memory:// is per process; use a redis:// lease store with more than one worker')
+            self.backend = MemoryLeaseBackend()
+
+    def get(self, phone_number_id):
+        """Get the active lease for a number, or None if unknown or expired"""
+        try:
+            return self.backend.get(phone_number_id)
+        except Exception as e:
+            logger.error(f'Lease store read error: {str(e)}')
+            return None
+
+    def grant(self, phone_number_id, user_id, expires_at):
+        """Record or refresh a lease"""
+        if not expires_at or expires_at <= datetime.utcnow():
+            self.revoke(phone_number_id)
+            return
+        try:
+            self.backend.put(phone_number_id, Lease(int(user_id), expires_at))
+        except Exception as e:
+            logger.error(f'Lease store write error: {str(e)}')
+
+    def revoke(self, phone_number_id):
+        """Drop the lease for a number"""
+        try:
+            self.backend.delete(phone_number_id)
+        except Exception as e:
+            logger.error(f'Lease store delete error: {str(e)}')
+
+    def holder(self, phone_number_id):
+        """Get the user id holding a number, or None"""
+        lease = self.get(phone_number_id)
+        return lease.user_id if lease else None
+
+# Global lease store instance
+lease_store = LeaseStore()
@@ -0,0 +1,135 @@
+"""Idle Socket.IO connection load test.
+
+Opens many authenticated, idle websocket connections against a running
+server and reports how many stayed connected and how much the server
+process grew per socket. Run the server under the mode being measured:
+
+    SOCKETIO_ASYNC_MODE=eventlet JWT_SECRET_KEY=... python main.py
+    python loadtest_sockets.py --connections 10000 --server-pid <pid>
+
+The client side is asyncio, so one process can hold 10k sockets; raise
+``ulimit -n`` on both sides above the connection count first.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+import jwt
+import socketio
+
+def make_token(secret, user_id, lifetime=3600):
+    """Access token accepted by the connect handler (flask_jwt_extended claims)"""
+    now = int(time.time())
+    return jwt.encode({
+        'sub': str(user_id),
+        'type': 'access',
+        'fresh': False,
+        'jti': str(uuid.uuid4()),
+        'iat': now,
+        'nbf': now,
+        'exp': now + lifetime
+    }, secret, algorithm='HS256')
+
+def rss_kb(pid):
+    """Resident set size of a process in KiB, from /proc"""
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.disconnected = 0
+        self.connect_times = []
+
+async def open_connection(url, token, stats, clients, semaphore, timeout):
+    client = socketio.AsyncClient(reconnection=False, handle_sigint=False)
+
+    @client.on('disconnect')
+    async def on_disconnect(*args):
+        stats.disconnected += 1
+
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                client.connect(url, auth={'token': token}, transports=['websocket'], wait_timeout=timeout),
+                timeout
+            )
+        except Exception:
+            stats.failed += 1
+            return
+        stats.connect_times.append(time.perf_counter() - start)
+        stats.connected += 1
+        clients.append(client)
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run(args):
+    stats = Stats()
+    clients = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    baseline = rss_kb(args.server_pid) if args.server_pid else None
+
+    start = time.perf_counter()
+    tasks = [
+        open_connection(args.url, make_token(args.jwt_secret, i % args.users + 1), stats, clients, semaphore, args.timeout)
+        for i in range(args.connections)
+    ]
+    await asyncio.gather(*tasks)
+    ramp_seconds = time.perf_counter() - start
+
+    print(f'connected {stats.connected}/{args.connections} in {ramp_seconds:.1f}s '
+          f'({stats.failed} failed, p50 {percentile(stats.connect_times, 0.5) * 1000:.0f}ms, '
+          f'p99 {percentile(stats.connect_times, 0.99) * 1000:.0f}ms)')
+
+    # Hold the sockets idle through several ping intervals
+    samples = []
+    deadline = time.monotonic() + args.hold
+    while time.monotonic() < deadline:
+        await asyncio.sleep(min(5, args.hold))
+        if args.server_pid:
+            samples.append(rss_kb(args.server_pid))
+        print(f'  idle: {stats.connected - stats.disconnected} open'
+              + (f', server rss {samples[-1] / 1024:.0f} MiB' if samples else ''))
+
+    ok = stats.failed == 0 and stats.disconnected == 0
+    if args.server_pid and samples:
+        peak = max(samples)
+        per_socket = (peak - baseline) / max(stats.connected, 1)
+        # Bounded: memory stops growing once the sockets are idle
+        drift = samples[-1] - samples[0]
+        print(f'server rss {baseline / 1024:.0f} -> {peak / 1024:.0f} MiB, '
+              f'{per_socket:.1f} KiB per socket, {drift / 1024:+.1f} MiB while idle')
+        if args.max_kb_per_socket and per_socket > args.max_kb_per_socket:
+            ok = False
+
+    await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+    print('PASS' if ok else 'FAIL')
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Hold many idle Socket.IO connections open against a server')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--connections', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=1000, help='distinct user ids the sockets are spread over')
+    parser.add_argument('--concurrency', type=int, default=200, help='connections being opened at once')
+    parser.add_argument('--hold', type=float, default=60, help='seconds to keep the sockets open and idle')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--jwt-secret', default=os.getenv('JWT_SECRET_KEY', 'your-super-secret-jwt-key'))
+    parser.add_argument('--server-pid', type=int, help='server process to sample memory from')
+    parser.add_argument('--max-kb-per-socket', type=float, default=128,
+                        help='fail if server memory grows by more than this per socket (0 disables)')
+    args = parser.parse_args()
+    raise SystemExit(0 if asyncio.run(run(args)) else 1)
+
+if __name__ == '__main__':
+    main()
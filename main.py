@@ -5,9 +5,20 @@ from datetime import datetime
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+# Green-thread servers must patch the standard library before anything else
+# (Flask, SQLAlchemy, redis, socket drivers) is imported
+SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'threading').lower()
+if SOCKETIO_ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif SOCKETIO_ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,39 +29,164 @@ from src.models.user import db
 from src.models.phone_number import PhoneNumber
 from src.models.message import Message
 from src.models.sms_provider import SMSProvider
+from src.models.user_session import UserSession
+from src.models.inventory_counts import inventory_counts
+from src.models.lease_store import lease_store
+from src.models.prefix_index import prefix_index
+from src.models.recipient_cache import unknown_recipients
+from src.utils.password_hasher import password_hasher
+from src.utils.identity_cache import identity_cache
+from src.utils.token_revocation import token_revocation
+from src.utils.rate_limiter import rate_limiter
+from src.utils.webhook_signatures import webhook_verifier
+from src.utils.webhook_spool import webhook_spool
+from src.utils.flood_guard import flood_guard
+from src.utils.heavy_hitters import traffic_sketches
 
 # Import routes
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp
 from src.routes.numbers import numbers_bp
 from src.routes.messages import messages_bp
-from src.routes.webhooks import webhooks_bp
+from src.routes.webhooks import webhooks_bp, replay_spooled_webhook
+from src.routes.realtime import realtime_bp
+from src.routes.admin import admin_bp
 
 # Import realtime
 from src.realtime.socket_manager import socket_manager
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
+# Reverse proxies in front of the app (nginx.conf adds one); their X-Forwarded-For
+# and X-Forwarded-Proto become remote_addr and the scheme. Set 0 when the app is
+# exposed directly, or clients could pick their own address.
+app.config['TRUSTED_PROXY_HOPS'] = int(os.getenv('TRUSTED_PROXY_HOPS', 1))
+if app.config['TRUSTED_PROXY_HOPS'] > 0:
+    app.wsgi_app = ProxyFix(
+        app.wsgi_app,
+        x_for=app.config['TRUSTED_PROXY_HOPS'],
+        x_proto=app.config['TRUSTED_PROXY_HOPS']
+    )
+
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-super-secret-jwt-key')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 3600)))
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 2592000)))
+app.config['SESSION_SWEEP_SECONDS'] = int(os.getenv('SESSION_SWEEP_SECONDS', 3600))
+
+# Password hashing: bcrypt cost and the bounded worker pool it runs on
+app.config['BCRYPT_ROUNDS'] = int(os.getenv('BCRYPT_ROUNDS', 12))
+app.config['BCRYPT_POOL_SIZE'] = int(os.getenv('BCRYPT_POOL_SIZE', os.cpu_count() or 2))
+app.config['BCRYPT_MAX_PENDING'] = int(os.getenv('BCRYPT_MAX_PENDING', app.config['BCRYPT_POOL_SIZE'] * 4))
+
+# Per-process cache of user snapshots for JWT-authenticated requests
+app.config['IDENTITY_CACHE_TTL'] = int(os.getenv('IDENTITY_CACHE_TTL', 60))
+app.config['IDENTITY_CACHE_SIZE'] = int(os.getenv('IDENTITY_CACHE_SIZE', 10000))
+
+# Revoked JWT ids (logout); memory:// is per-process, use redis:// with multiple workers
+app.config['TOKEN_REVOCATION_URL'] = os.getenv('TOKEN_REVOCATION_URL', 'memory://')
+app.config['TOKEN_REVOCATION_CAPACITY'] = int(os.getenv('TOKEN_REVOCATION_CAPACITY', 100000))
+
+# Request rate limits (per minute); memory:// is per-process, use redis:// with multiple workers
+app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+app.config['RATE_LIMIT_STORAGE_URL'] = os.getenv('RATE_LIMIT_STORAGE_URL', 'memory://')
+app.config['RATE_LIMIT_MESSAGES_PER_MINUTE'] = int(os.getenv('RATE_LIMIT_MESSAGES_PER_MINUTE', 120))
+app.config['RATE_LIMIT_AUTH_PER_MINUTE'] = int(os.getenv('RATE_LIMIT_AUTH_PER_MINUTE', 20))
+app.config['RATE_LIMIT_WEBHOOK_PER_MINUTE'] = int(os.getenv('RATE_LIMIT_WEBHOOK_PER_MINUTE', 100))
+
+# Webhook signature verification; WEBHOOK_BASE_URL is the public URL providers sign
+# (e.g. https://api.example.com) when running behind a proxy
+app.config['WEBHOOK_VERIFY_SIGNATURES'] = os.getenv('WEBHOOK_VERIFY_SIGNATURES', 'true').lower() == 'true'
+app.config['WEBHOOK_BASE_URL'] = os.getenv('WEBHOOK_BASE_URL', '')
+app.config['WEBHOOK_SECRET_CACHE_SECONDS'] = int(os.getenv('WEBHOOK_SECRET_CACHE_SECONDS', 300))
+
+# Negative cache for webhook recipients that are not in phone_numbers
+app.config['UNKNOWN_RECIPIENT_CACHE_TTL'] = int(os.getenv('UNKNOWN_RECIPIENT_CACHE_TTL', 60))
+app.config['UNKNOWN_RECIPIENT_CACHE_SIZE'] = int(os.getenv('UNKNOWN_RECIPIENT_CACHE_SIZE', 10000))
+
+# Local spool for webhooks received while the database is failing
+app.config['SPOOL_ENABLED'] = os.getenv('SPOOL_ENABLED', 'true').lower() == 'true'
+app.config['SPOOL_DIR'] = os.getenv('SPOOL_DIR', os.path.join(os.path.dirname(__file__), 'spool', 'webhooks'))
+app.config['SPOOL_SEGMENT_BYTES'] = int(os.getenv('SPOOL_SEGMENT_BYTES', 16 * 1024 * 1024))
+app.config['SPOOL_REPLAY_RATE'] = float(os.getenv('SPOOL_REPLAY_RATE', 20))
+
+# Per-(sender, recipient) flood throttling on webhook ingest; policy summarize or drop
+app.config['FLOOD_WINDOW_SECONDS'] = int(os.getenv('FLOOD_WINDOW_SECONDS', 60))
+app.config['FLOOD_MAX_MESSAGES'] = int(os.getenv('FLOOD_MAX_MESSAGES', 20))
+app.config['FLOOD_POLICY'] = os.getenv('FLOOD_POLICY', 'summarize')
+app.config['FLOOD_MAX_TRACKED_PAIRS'] = int(os.getenv('FLOOD_MAX_TRACKED_PAIRS', 50000))
+
+# Heavy-hitter sketches for inbound traffic (admin traffic endpoint)
+app.config['TRAFFIC_TOP_K'] = int(os.getenv('TRAFFIC_TOP_K', 20))
+app.config['TRAFFIC_SKETCH_EPSILON'] = float(os.getenv('TRAFFIC_SKETCH_EPSILON', 0.001))
+app.config['TRAFFIC_SKETCH_DELTA'] = float(os.getenv('TRAFFIC_SKETCH_DELTA', 0.01))
+
+# Phone number rotation
+app.config['NUMBER_COOLDOWN_SECONDS'] = int(os.getenv('NUMBER_COOLDOWN_SECONDS', 300))
+app.config['INVENTORY_RECONCILE_SECONDS'] = int(os.getenv('INVENTORY_RECONCILE_SECONDS', 60))
+
+# Lease store for number assignments (memory:// or redis://host:port/db);
+# memory:// refuses to start when WEB_CONCURRENCY says there are several workers
+app.config['WEB_CONCURRENCY'] = int(os.getenv('WEB_CONCURRENCY', 1))
+app.config['LEASE_STORE_URL'] = os.getenv('LEASE_STORE_URL', 'memory://')
 
 # Database configuration
 database_url = os.getenv('DATABASE_URL', "sqlite:///app.db")
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+if not database_url.startswith('sqlite'):
+    # Bound the connection pool: with green threads thousands of handlers can
+    # run concurrently, and each must wait for a pooled connection
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True
+    }
+
+# Socket.IO server mode: threading, eventlet or gevent
+app.config['SOCKETIO_ASYNC_MODE'] = SOCKETIO_ASYNC_MODE
+# Sockets one eventlet server holds open at once; eventlet's own default of 1024 caps idle dashboards
+app.config['SOCKETIO_MAX_CONNECTIONS'] = int(os.getenv('SOCKETIO_MAX_CONNECTIONS', 20000))
+
+# Cross-worker Socket.IO fan-out (e.g. redis://localhost:6379/0); unset keeps it in-process
+app.config['SOCKETIO_MESSAGE_QUEUE'] = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+app.config['SOCKETIO_CHANNEL'] = os.getenv('SOCKETIO_CHANNEL', 'flask-socketio')
+app.config['SOCKETIO_COALESCE_WINDOW_MS'] = int(os.getenv('SOCKETIO_COALESCE_WINDOW_MS', 25))
+app.config['SOCKETIO_DISPATCH_QUEUE_SIZE'] = int(os.getenv('SOCKETIO_DISPATCH_QUEUE_SIZE', 10000))
+app.config['SOCKETIO_DISPATCH_OVERFLOW'] = os.getenv('SOCKETIO_DISPATCH_OVERFLOW', 'drop_oldest')
+app.config['SOCKETIO_REPLAY_BUFFER_SIZE'] = int(os.getenv('SOCKETIO_REPLAY_BUFFER_SIZE', 100))
+app.config['SOCKETIO_COMPACT_FORMAT'] = os.getenv('SOCKETIO_COMPACT_FORMAT', 'true').lower() == 'true'
+app.config['SOCKETIO_LOGGER'] = os.getenv('SOCKETIO_LOGGER', 'false').lower() == 'true'
+app.config['SOCKETIO_ENGINEIO_LOGGER'] = os.getenv('SOCKETIO_ENGINEIO_LOGGER', 'false').lower() == 'true'
 
 # Initialize SocketIO
 socketio = socket_manager.init_app(app)
 
 # Initialize database
 db.init_app(app)
+inventory_counts.reconcile_interval = app.config['INVENTORY_RECONCILE_SECONDS']
+prefix_index.reconcile_interval = app.config['INVENTORY_RECONCILE_SECONDS']
+UserSession.sweep_interval = app.config['SESSION_SWEEP_SECONDS']
+lease_store.init_app(app)
+unknown_recipients.init_app(app)
+password_hasher.init_app(app)
+identity_cache.init_app(app)
+token_revocation.init_app(app)
+token_revocation.start(socketio.start_background_task)
+webhook_verifier.init_app(app)
+flood_guard.init_app(app)
+traffic_sketches.init_app(app)
+webhook_spool.init_app(app, handler=replay_spooled_webhook)
+webhook_spool.start(socketio.start_background_task, socketio.sleep)
 
 # Initialize JWT
 jwt = JWTManager(app)
 
+# Rate limits run before routing, after JWT setup (per-user limits read the token)
+rate_limiter.init_app(app)
+
 # CORS configuration
 cors_origins = os.getenv('CORS_ORIGINS', '*')
 if cors_origins == '*':
@@ -64,6 +200,8 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(numbers_bp, url_prefix='/api')
 app.register_blueprint(messages_bp, url_prefix='/api')
 app.register_blueprint(webhooks_bp, url_prefix='/api')
+app.register_blueprint(realtime_bp, url_prefix='/api')
+app.register_blueprint(admin_bp, url_prefix='/api')
 
 # JWT error handlers
 @jwt.expired_token_loader
@@ -90,6 +228,31 @@ def missing_token_callback(error):
         'code': 'MISSING_TOKEN'
     }, 401
 
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return token_revocation.is_revoked(jwt_payload['jti'])
+
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return {
+        'error': 'Token Revoked',
+        'message': 'The JWT token has been revoked',
+        'code': 'TOKEN_REVOKED'
+    }, 401
+
+@jwt.user_lookup_loader
+def user_lookup_callback(jwt_header, jwt_payload):
+    # Served from the identity cache; get_current_user() returns a UserSnapshot
+    return identity_cache.get(int(jwt_payload['sub']))
+
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_header, jwt_payload):
+    return {
+        'error': 'Authentication Failed',
+        'message': 'User for this token no longer exists',
+        'code': 'USER_NOT_FOUND'
+    }, 401
+
 # Routes and error handlers will be registered here
 # Database initialization will be done in main block
 
@@ -113,7 +276,9 @@ def api_info():
             'auth': '/api/auth',
             'numbers': '/api/numbers',
             'messages': '/api/messages',
-            'webhooks': '/api/webhooks'
+            'webhooks': '/api/webhooks',
+            'realtime': '/api/realtime/metrics',
+            'admin': '/api/admin/traffic'
         }
     }, 200
 
@@ -186,16 +351,11 @@ if __name__ == '__main__':
                 
                 twilio_provider = SMSProvider.query.filter_by(name='twilio').first()
                 
-                for number in test_numbers:
-                    phone_number = PhoneNumber(
-                        phone_number=number,
-                        country_code='US',
-                        provider_id=twilio_provider.id if twilio_provider else None,
-                        status='available'
-                    )
-                    db.session.add(phone_number)
-                
-                db.session.commit()
+                PhoneNumber.import_numbers(
+                    test_numbers,
+                    country_code='US',
+                    provider_id=twilio_provider.id if twilio_provider else None
+                )
                 print("Test phone numbers seeded successfully")
                 
     except Exception as e:
@@ -203,10 +363,16 @@ if __name__ == '__main__':
         # Continue anyway for development
     
     # Use socketio.run instead of app.run for Socket.IO support
+    run_options = {}
+    if SOCKETIO_ASYNC_MODE == 'threading':
+        run_options['allow_unsafe_werkzeug'] = True
+    elif SOCKETIO_ASYNC_MODE == 'eventlet':
+        run_options['max_size'] = app.config['SOCKETIO_MAX_CONNECTIONS']
+    
     socketio.run(
         app, 
         host='0.0.0.0', 
         port=5000, 
         debug=True,
-        allow_unsafe_werkzeug=True
+        **run_options
     )
\ No newline at end of file
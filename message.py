@@ -5,6 +5,10 @@ from src.models.user import db
 
 class Message(db.Model):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Idempotency checks when replaying spooled webhooks
+        db.Index('idx_messages_provider_message_id', 'provider_id', 'provider_message_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     phone_number_id = db.Column(db.Integer, db.ForeignKey('phone_numbers.id'), nullable=False)
@@ -89,6 +93,16 @@ class Message(db.Model):
         db.session.commit()
         return message
     
+    @classmethod
+    def exists_from_provider(cls, provider_id, provider_message_id):
+        """Check if a provider message has already been stored"""
+        return db.session.query(
+            cls.query.filter_by(
+                provider_id=provider_id,
+                provider_message_id=provider_message_id
+            ).exists()
+        ).scalar()
+    
     @classmethod
     def get_messages_for_user(cls, user_id, phone_number_id=None, message_type=None, is_read=None, since=None, limit=50, offset=0):
         """Get messages for a specific user with filtering options"""
@@ -12,7 +12,7 @@ messages_bp = Blueprint('messages', __name__)
 def get_messages():
     """Get SMS messages for user's assigned phone numbers"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get query parameters
         phone_number_id = request.args.get('phone_number_id', type=int)
@@ -40,11 +40,7 @@ def get_messages():
         
         # Validate phone_number_id belongs to user if specified
         if phone_number_id:
-            phone_number = PhoneNumber.query.filter_by(
-                id=phone_number_id,
-                user_id=current_user_id
-            ).first()
-            if not phone_number:
+            if not PhoneNumber.is_owned_by(phone_number_id, current_user_id):
                 return jsonify({
                     'error': 'Forbidden',
                     'message': 'Access denied to this phone number',
@@ -95,7 +91,7 @@ def get_messages():
 def get_message(message_id):
     """Get details of a specific message"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get message with phone number relationship
         message = Message.query.join(PhoneNumber).filter(
@@ -124,7 +120,7 @@ def get_message(message_id):
 def mark_message_read(message_id):
     """Mark a specific message as read"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get message with phone number relationship
         message = Message.query.join(PhoneNumber).filter(
@@ -159,7 +155,7 @@ def mark_message_read(message_id):
 def mark_all_messages_read():
     """Mark all messages as read for the current user"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get query parameters for filtering
         phone_number_id = request.args.get('phone_number_id', type=int)
@@ -173,11 +169,7 @@ def mark_all_messages_read():
         
         if phone_number_id:
             # Validate phone_number_id belongs to user
-            phone_number = PhoneNumber.query.filter_by(
-                id=phone_number_id,
-                user_id=current_user_id
-            ).first()
-            if not phone_number:
+            if not PhoneNumber.is_owned_by(phone_number_id, current_user_id):
                 return jsonify({
                     'error': 'Forbidden',
                     'message': 'Access denied to this phone number',
@@ -210,7 +202,7 @@ def mark_all_messages_read():
 def get_message_stats():
     """Get message statistics for the current user"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get base query for user's messages
         base_query = Message.query.join(PhoneNumber).filter(PhoneNumber.user_id == current_user_id)
@@ -267,7 +259,7 @@ def get_message_stats():
 def search_messages():
     """Search messages by content"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get query parameters
         query_text = request.args.get('q', '').strip()
@@ -291,11 +283,7 @@ def search_messages():
         
         if phone_number_id:
             # Validate phone_number_id belongs to user
-            phone_number = PhoneNumber.query.filter_by(
-                id=phone_number_id,
-                user_id=current_user_id
-            ).first()
-            if not phone_number:
+            if not PhoneNumber.is_owned_by(phone_number_id, current_user_id):
                 return jsonify({
                     'error': 'Forbidden',
                     'message': 'Access denied to this phone number',
@@ -0,0 +1,146 @@
+import threading
+import time
+
+# Upper bounds in milliseconds for latency histogram buckets
+DEFAULT_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram"""
+
+    def __init__(self, buckets_ms=DEFAULT_LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets_ms) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+
+    def observe(self, seconds):
+        """Record one duration given in seconds"""
+        ms = seconds * 1000.0
+        index = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum_ms += ms
+            if ms > self._max_ms:
+                self._max_ms = ms
+
+    def snapshot(self):
+        """Get count, sum, average, max and cumulative bucket counts"""
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(self.buckets_ms + ('+Inf',), self._counts):
+                running += count
+                cumulative.append({'le': bound, 'count': running})
+            return {
+                'count': self._count,
+                'sum_ms': round(self._sum_ms, 3),
+                'avg_ms': round(self._sum_ms / self._count, 3) if self._count else 0.0,
+                'max_ms': round(self._max_ms, 3),
+                'buckets': cumulative
+            }
+
+class CounterSet:
+    """Thread-safe named counters"""
+
+    def __init__(self, *names):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(names, 0)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def get(self, name):
+        return self._counts.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+class EventRates:
+    """Per-event totals and rates over a sliding window of one-second buckets"""
+
+    def __init__(self, window_seconds=60):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._totals = {}  # event -> count since start
+        self._buckets = [(None, {}) for _ in range(window_seconds)]  # (second, {event: count})
+
+    def record(self, event):
+        second = int(time.time())
+        slot = second % self.window_seconds
+        with self._lock:
+            self._totals[event] = self._totals.get(event, 0) + 1
+            bucket_second, counts = self._buckets[slot]
+            if bucket_second != second:
+                counts = {}
+                self._buckets[slot] = (second, counts)
+            counts[event] = counts.get(event, 0) + 1
+
+    def snapshot(self):
+        """Get {event: {'total', 'per_second'}} averaged over the window"""
+        horizon = int(time.time()) - self.window_seconds
+        with self._lock:
+            recent = {}
+            for bucket_second, counts in self._buckets:
+                if bucket_second is None or bucket_second <= horizon:
+                    continue
+                for event, count in counts.items():
+                    recent[event] = recent.get(event, 0) + count
+            return {
+                event: {
+                    'total': total,
+                    'per_second': round(recent.get(event, 0) / self.window_seconds, 3)
+                }
+                for event, total in self._totals.items()
+            }
+
+class PrometheusWriter:
+    """Minimal Prometheus text exposition format builder"""
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._lines = []
+        self._declared = set()
+
+    def _declare(self, name, metric_type, help_text):
+        if name not in self._declared:
+            self._declared.add(name)
+            if help_text:
+                self._lines.append(f'# HELP {name} {help_text}')
+            self._lines.append(f'# TYPE {name} {metric_type}')
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        parts = []
+        for key, value in labels.items():
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{key}="{value}"')
+        return '{' + ','.join(parts) + '}'
+
+    def sample(self, name, value, metric_type='gauge', labels=None, help_text=None):
+        name = self.prefix + name
+        self._declare(name, metric_type, help_text)
+        self._lines.append(f'{name}{self._labels(labels)} {value}')
+
+    def histogram(self, name, snapshot, labels=None, help_text=None):
+        """Write a LatencyHistogram snapshot"""
+        name = self.prefix + name
+        self._declare(name, 'histogram', help_text)
+        labels = dict(labels or {})
+        for bucket in snapshot['buckets']:
+            self._lines.append(f'{name}_bucket{self._labels(dict(labels, le=bucket["le"]))} {bucket["count"]}')
+        self._lines.append(f'{name}_sum{self._labels(labels)} {snapshot["sum_ms"]}')
+        self._lines.append(f'{name}_count{self._labels(labels)} {snapshot["count"]}')
+
+    def render(self):
+        return '\n'.join(self._lines) + '\n'
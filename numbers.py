@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.models.user import User, db
 from src.models.phone_number import PhoneNumber
 from src.models.sms_provider import SMSProvider
+from src.models.lease_store import lease_store
+from src.models.prefix_index import normalize_prefix
 
 numbers_bp = Blueprint('numbers', __name__)
 
@@ -13,21 +15,52 @@ def get_numbers():
     try:
         # Get query parameters
         country_code = request.args.get('country_code')
+        prefix = request.args.get('prefix')
         status = request.args.get('status', 'available')
         limit = min(int(request.args.get('limit', 20)), 100)  # Max 100
         offset = int(request.args.get('offset', 0))
         
-        # Build query
-        query = PhoneNumber.query
-        
-        if status:
-            query = query.filter_by(status=status)
-        
         if country_code:
-            query = query.filter_by(country_code=country_code.upper())
+            country_code = country_code.upper()
+        
+        # Prefix/area-code search is served from the in-memory prefix index
+        if prefix:
+            if status != 'available':
+                return jsonify({
+                    'error': 'Validation Error',
+                    'message': 'prefix can only be used with status=available',
+                    'code': 'INVALID_FILTER'
+                }), 400
+            
+            prefix = normalize_prefix(prefix)
+            total, numbers, prefix_counts = PhoneNumber.search_available_by_prefix(
+                prefix, country_code, limit, offset
+            )
+            
+            return jsonify({
+                'numbers': [number.to_dict() for number in numbers],
+                'total': total,
+                'limit': limit,
+                'offset': offset,
+                'prefix': prefix,
+                'prefix_counts': prefix_counts
+            }), 200
+        
+        # Build query
+        if status == 'available':
+            # Only offer numbers whose cooldown has passed, in rotation order
+            query = PhoneNumber.ready_query(country_code)
+        else:
+            query = PhoneNumber.query
+            
+            if status:
+                query = query.filter_by(status=status)
+            
+            if country_code:
+                query = query.filter_by(country_code=country_code)
         
-        # Get total count
-        total = query.count()
+        # Get total count from the cached inventory counts
+        total = PhoneNumber.count_by_status(status or None, country_code)
         
         # Get paginated results
         numbers = query.offset(offset).limit(limit).all()
@@ -51,7 +84,7 @@ def get_numbers():
 def assign_number():
     """Assign an available phone number to the authenticated user"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         data = request.get_json()
         
         # Validate required fields
@@ -90,6 +123,14 @@ def assign_number():
                 'code': 'NUMBER_NOT_AVAILABLE'
             }), 409
         
+        # Check if number is still cooling down after its last release
+        if phone_number.is_cooling_down():
+            return jsonify({
+                'error': 'Conflict',
+                'message': 'Phone number was released recently and is cooling down',
+                'code': 'NUMBER_COOLING_DOWN'
+            }), 409
+        
         # Check if user already has an active number
         existing_assignment = PhoneNumber.query.filter_by(
             user_id=current_user_id,
@@ -123,7 +164,7 @@ def assign_number():
 def get_number(number_id):
     """Get details of a specific phone number"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         phone_number = PhoneNumber.query.get(number_id)
         if not phone_number:
@@ -141,6 +182,10 @@ def get_number(number_id):
                 'code': 'ACCESS_DENIED'
             }), 403
         
+        # The row is authoritative; rewrite a lease left stale by a failed write-through
+        if phone_number.user_id == current_user_id and lease_store.holder(number_id) != current_user_id:
+            phone_number.refresh_lease()
+        
         return jsonify(phone_number.to_dict()), 200
         
     except Exception as e:
@@ -155,7 +200,7 @@ def get_number(number_id):
 def release_number(number_id):
     """Release an assigned phone number back to available pool"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         phone_number = PhoneNumber.query.get(number_id)
         if not phone_number:
@@ -192,7 +237,7 @@ def release_number(number_id):
 def get_my_numbers():
     """Get phone numbers assigned to the current user"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
         # Get user's assigned numbers
         numbers = PhoneNumber.query.filter_by(user_id=current_user_id).all()
@@ -221,7 +266,7 @@ def get_my_numbers():
 def extend_number(number_id):
     """Extend the assignment duration of a phone number"""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         data = request.get_json()
         
         additional_hours = data.get('additional_hours', 1)
@@ -271,6 +316,7 @@ def extend_number(number_id):
             phone_number.expires_at = datetime.utcnow() + timedelta(hours=additional_hours)
         
         db.session.commit()
+        phone_number.refresh_lease()
         
         return jsonify({
             'message': 'Phone number assignment extended successfully',
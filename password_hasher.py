@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import bcrypt
+
+DEFAULT_BCRYPT_ROUNDS = 12
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool has no room for another request"""
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a bounded worker pool.
+
+    bcrypt is deliberately slow; running it inline lets a burst of logins
+    tie up every request thread. Work is handed to a fixed-size pool of OS
+    threads and at most ``max_pending`` requests may be queued or running
+    at once, beyond which callers get HasherBusy instead of waiting.
+    Under gevent/eventlet the pool is the hub's native thread pool so
+    hashing never blocks the event loop.
+    """
+
+    def __init__(self, app=None):
+        self.rounds = DEFAULT_BCRYPT_ROUNDS
+        self.pool_size = os.cpu_count() or 2
+        self.max_pending = self.pool_size * 4
+        self.timeout = 30
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure cost and pool limits from app config"""
+        self.rounds = app.config.get('BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS)
+        self.pool_size = app.config.get('BCRYPT_POOL_SIZE', self.pool_size)
+        self.max_pending = app.config.get('BCRYPT_MAX_PENDING', self.pool_size * 4)
+        self.timeout = app.config.get('BCRYPT_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = self._make_executor(app.config.get('SOCKETIO_ASYNC_MODE', 'threading'))
+
+    def _make_executor(self, async_mode):
+        if async_mode == 'gevent':
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=self.pool_size)
+        if async_mode == 'eventlet':
+            from eventlet import tpool
+            tpool.set_num_threads(self.pool_size)
+            return tpool
+        return ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='bcrypt')
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Password hashing pool is saturated')
+        try:
+            if self._executor is None:
+                self._executor = self._make_executor('threading')
+            if not hasattr(self._executor, 'submit'):
+                # eventlet.tpool runs the call on a native thread and yields meanwhile
+                return self._executor.execute(fn, *args)
+            return self._executor.submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password at the configured cost"""
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+        return hashed.decode('utf-8')
+
+    def verify(self, password, password_hash):
+        """Check a password against a stored hash"""
+        if not password_hash:
+            return False
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """Check if a stored hash was made at a different cost than configured"""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
@@ -1,5 +1,13 @@
 from datetime import datetime, timedelta
+from flask import current_app
 from src.models.user import db
+from src.models.inventory_counts import inventory_counts
+from src.models.lease_store import lease_store
+from src.models.prefix_index import prefix_index
+from src.models.recipient_cache import unknown_recipients
+
+# Default seconds a released number sits out before it can be handed out again
+DEFAULT_NUMBER_COOLDOWN_SECONDS = 300
 
 class PhoneNumber(db.Model):
     __tablename__ = 'phone_numbers'
@@ -12,6 +20,7 @@ class PhoneNumber(db.Model):
     status = db.Column(db.String(20), default='available', nullable=False)
     assigned_at = db.Column(db.DateTime, nullable=True)
     expires_at = db.Column(db.DateTime, nullable=True)
+    released_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     extra_data = db.Column(db.JSON, default={})
@@ -32,25 +41,35 @@ class PhoneNumber(db.Model):
             'status': self.status,
             'assigned_at': self.assigned_at.isoformat() if self.assigned_at else None,
             'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'released_at': self.released_at.isoformat() if self.released_at else None,
             'created_at': self.created_at.isoformat(),
             'metadata': self.extra_data
         }
     
     def assign_to_user(self, user_id, duration_hours=1):
         """Assign this phone number to a user for a specified duration"""
+        old_status = self.status
         self.user_id = user_id
         self.status = 'assigned'
         self.assigned_at = datetime.utcnow()
         self.expires_at = datetime.utcnow() + timedelta(hours=duration_hours)
         db.session.commit()
+        lease_store.grant(self.id, user_id, self.expires_at)
+        inventory_counts.record_transition(self.country_code, old_status, self.status)
+        prefix_index.discard(self.phone_number, self.id, self.country_code)
     
     def release(self):
         """Release this phone number back to available pool"""
+        old_status = self.status
         self.user_id = None
         self.status = 'available'
         self.assigned_at = None
         self.expires_at = None
+        self.released_at = datetime.utcnow()
         db.session.commit()
+        lease_store.revoke(self.id)
+        inventory_counts.record_transition(self.country_code, old_status, self.status, self.released_at)
+        prefix_index.add(self.phone_number, self.id, self.country_code, self.released_at)
     
     def is_expired(self):
         """Check if the phone number assignment has expired"""
@@ -58,13 +77,107 @@ class PhoneNumber(db.Model):
             return True
         return False
     
+    def refresh_lease(self):
+        """Write the current assignment through to the lease store"""
+        if self.status == 'assigned' and self.user_id:
+            lease_store.grant(self.id, self.user_id, self.expires_at)
+        else:
+            lease_store.revoke(self.id)
+    
     @classmethod
-    def get_available_numbers(cls, country_code=None, limit=20, offset=0):
-        """Get available phone numbers with optional filtering"""
-        query = cls.query.filter_by(status='available')
+    def is_owned_by(cls, phone_number_id, user_id):
+        """Check if a user holds a phone number, answering from the lease store when possible"""
+        holder = lease_store.holder(phone_number_id)
+        if holder is not None and str(holder) == str(user_id):
+            return True
+        
+        # Lease miss, or a lease for someone else that may predate a reassignment:
+        # confirm against the database and rewrite the lease store
+        phone_number = cls.query.filter_by(id=phone_number_id, user_id=user_id).first()
+        if phone_number and phone_number.status == 'assigned':
+            phone_number.refresh_lease()
+        return phone_number is not None
+    
+    @staticmethod
+    def get_cooldown():
+        """Get the configured post-release cooldown as a timedelta"""
+        seconds = current_app.config.get('NUMBER_COOLDOWN_SECONDS', DEFAULT_NUMBER_COOLDOWN_SECONDS)
+        return timedelta(seconds=seconds)
+    
+    def is_cooling_down(self):
+        """Check if the number was released too recently to be reassigned"""
+        if self.released_at and datetime.utcnow() < self.released_at + self.get_cooldown():
+            return True
+        return False
+    
+    @classmethod
+    def ready_query(cls, country_code=None):
+        """Query over the ready queue: available numbers past their cooldown, least recently used first.
+        
+        The ORDER BY matches the ready-queue indexes column for column, so the
+        head of the queue is read straight off an index instead of sorting the
+        whole free pool, with or without a country filter.
+        """
+        cutoff = datetime.utcnow() - cls.get_cooldown()
+        query = cls.query.filter(
+            cls.status == 'available',
+            db.or_(cls.released_at.is_(None), cls.released_at <= cutoff)
+        )
         if country_code:
-            query = query.filter_by(country_code=country_code)
-        return query.offset(offset).limit(limit).all()
+            query = query.filter(cls.country_code == country_code)
+        # Never-used numbers have no released_at and go to the front of the queue
+        return query.order_by(cls.released_at.asc().nullsfirst(), cls.id.asc())
+    
+    @classmethod
+    def get_available_numbers(cls, country_code=None, limit=20, offset=0):
+        """Get available phone numbers in rotation order with optional filtering"""
+        return cls.ready_query(country_code).offset(offset).limit(limit).all()
+    
+    @classmethod
+    def count_available(cls, country_code=None):
+        """Count ready-queue numbers from the cached inventory counts"""
+        return inventory_counts.get_total('available', country_code, cooldown=cls.get_cooldown())
+    
+    @classmethod
+    def count_by_status(cls, status, country_code=None):
+        """Count numbers with a given status (any status when None) from the cached inventory counts"""
+        if status == 'available':
+            return cls.count_available(country_code)
+        return inventory_counts.get_total(status, country_code)
+    
+    @classmethod
+    def search_available_by_prefix(cls, prefix, country_code=None, limit=20, offset=0):
+        """Get (total, numbers, prefix_counts) for ready numbers starting with prefix, ordered by number"""
+        cooldown = cls.get_cooldown()
+        total, ids = prefix_index.search(prefix, cooldown, country_code, limit, offset)
+        numbers = []
+        if ids:
+            numbers = cls.query.filter(cls.id.in_(ids)).order_by(cls.phone_number.asc()).all()
+        return total, numbers, prefix_index.prefix_counts(prefix, cooldown, country_code)
+    
+    @classmethod
+    def import_numbers(cls, numbers, country_code, provider_id=None, status='available'):
+        """Bulk add phone numbers to the pool"""
+        phone_numbers = [
+            cls(
+                phone_number=number,
+                country_code=country_code,
+                provider_id=provider_id,
+                status=status
+            )
+            for number in numbers
+        ]
+        db.session.add_all(phone_numbers)
+        db.session.commit()
+        inventory_counts.record_added(country_code, status, len(phone_numbers))
+        for phone_number in phone_numbers:
+            unknown_recipients.discard(phone_number.phone_number)
+        if status == 'available':
+            prefix_index.add_many(
+                [(phone_number.phone_number, phone_number.id) for phone_number in phone_numbers],
+                country_code
+            )
+        return phone_numbers
     
     @classmethod
     def cleanup_expired(cls):
@@ -77,5 +190,23 @@ class PhoneNumber(db.Model):
         for number in expired_numbers:
             number.release()
         
+        # Earlier releases whose cooldown has passed count as ready again
+        inventory_counts.expire_cooling(cls.get_cooldown())
+        
         return len(expired_numbers)
 
+def _ready_queue_index(name, *columns):
+    """Index (*columns, released_at ASC NULLS FIRST, id), the ready_query order.
+    
+    SQLite already sorts NULLs first and rejects NULLS FIRST in an index, so
+    the null ordering is only spelled out for PostgreSQL, where ascending
+    indexes otherwise keep NULLs last.
+    """
+    db.Index(name, *columns, PhoneNumber.released_at, PhoneNumber.id).ddl_if(
+        callable_=lambda ddl, target, bind, dialect=None, **kw: dialect.name != 'postgresql'
+    )
+    db.Index(name, *columns, PhoneNumber.released_at.asc().nullsfirst(), PhoneNumber.id).ddl_if(dialect='postgresql')
+
+# Ready queue per country, and across countries for unfiltered listings
+_ready_queue_index('idx_phone_numbers_ready_queue', PhoneNumber.status, PhoneNumber.country_code)
+_ready_queue_index('idx_phone_numbers_ready_queue_all', PhoneNumber.status)
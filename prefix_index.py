@@ -0,0 +1,169 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime
+import heapq
+import itertools
+import threading
+import time
+from src.models.user import db
+
+# How often the in-memory index is rebuilt from the phone_numbers table
+DEFAULT_RECONCILE_INTERVAL_SECONDS = 60
+
+# Sorts after every character that can appear in a normalized number
+_PREFIX_END = '\uffff'
+
+def normalize_prefix(prefix):
+    """Normalize a number prefix the same way stored numbers are normalized"""
+    normalized = ''.join(c for c in prefix if c.isdigit() or c == '+')
+    if not normalized.startswith('+'):
+        normalized = '+' + normalized
+    return normalized
+
+class PrefixIndex:
+    """Sorted per-country arrays of ready-to-assign numbers for prefix search.
+
+    Each array holds (phone_number, id) pairs ordered by the normalized
+    number, so every prefix maps to one contiguous slice found with two
+    binary searches: counts are O(log n) and pages are slices, with no
+    LIKE scan on phone_numbers. Released numbers wait in a heap until
+    their cooldown passes, so the index only ever contains numbers the
+    rotation policy would offer.
+    """
+
+    def __init__(self, reconcile_interval=DEFAULT_RECONCILE_INTERVAL_SECONDS):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._numbers = defaultdict(list)  # country_code -> sorted [(phone_number, id)]
+        self._cooling = []  # heap of (released_at, phone_number, id, country_code)
+        self._last_reconciled = None
+
+    def is_stale(self):
+        """Check if the index is due for reconciliation"""
+        if self._last_reconciled is None:
+            return True
+        return time.monotonic() - self._last_reconciled >= self.reconcile_interval
+
+    def reconcile(self, cooldown):
+        """Rebuild the index from available numbers in the phone_numbers table"""
+        from src.models.phone_number import PhoneNumber
+
+        rows = db.session.query(
+            PhoneNumber.id,
+            PhoneNumber.phone_number,
+            PhoneNumber.country_code,
+            PhoneNumber.released_at
+        ).filter(PhoneNumber.status == 'available').all()
+
+        cutoff = datetime.utcnow() - cooldown
+        numbers = defaultdict(list)
+        cooling = []
+        for number_id, phone_number, country_code, released_at in rows:
+            if released_at and released_at > cutoff:
+                cooling.append((released_at, phone_number, number_id, country_code))
+            else:
+                numbers[country_code].append((phone_number, number_id))
+
+        for entries in numbers.values():
+            entries.sort()
+        heapq.heapify(cooling)
+
+        with self._lock:
+            self._numbers = numbers
+            self._cooling = cooling
+            self._last_reconciled = time.monotonic()
+
+    def add(self, phone_number, number_id, country_code, released_at=None):
+        """Index an available number, holding it back while it cools down"""
+        with self._lock:
+            if released_at is not None:
+                heapq.heappush(self._cooling, (released_at, phone_number, number_id, country_code))
+            else:
+                insort(self._numbers[country_code], (phone_number, number_id))
+
+    def add_many(self, numbers, country_code):
+        """Index a batch of ready (phone_number, id) pairs, e.g. a bulk import.
+
+        One insort per number shifts the array each time, which is quadratic
+        for a large import. Sorting the batch and appending it leaves two
+        sorted runs that a single sort merges in linear time.
+        """
+        batch = sorted(numbers)
+        with self._lock:
+            entries = self._numbers[country_code]
+            entries.extend(batch)
+            entries.sort()
+
+    def discard(self, phone_number, number_id, country_code):
+        """Remove a number that is no longer available"""
+        with self._lock:
+            entries = self._numbers.get(country_code)
+            if not entries:
+                return
+            key = (phone_number, number_id)
+            i = bisect_left(entries, key)
+            if i < len(entries) and entries[i] == key:
+                del entries[i]
+
+    def _promote_cooled(self, cooldown):
+        cutoff = datetime.utcnow() - cooldown
+        while self._cooling and self._cooling[0][0] <= cutoff:
+            _, phone_number, number_id, country_code = heapq.heappop(self._cooling)
+            insort(self._numbers[country_code], (phone_number, number_id))
+
+    def _prepare(self, cooldown):
+        if self.is_stale():
+            self.reconcile(cooldown)
+
+    def _ranges(self, prefix, country_code):
+        if country_code:
+            entries = self._numbers.get(country_code, [])
+            candidates = [entries]
+        else:
+            candidates = self._numbers.values()
+        for entries in candidates:
+            lo = bisect_left(entries, (prefix,))
+            hi = bisect_right(entries, (prefix + _PREFIX_END,))
+            if hi > lo:
+                yield entries, lo, hi
+
+    def count(self, prefix, cooldown, country_code=None):
+        """Count ready numbers starting with prefix"""
+        self._prepare(cooldown)
+        with self._lock:
+            self._promote_cooled(cooldown)
+            return sum(hi - lo for _, lo, hi in self._ranges(prefix, country_code))
+
+    def search(self, prefix, cooldown, country_code=None, limit=20, offset=0):
+        """Get (total, [ids]) for a page of ready numbers starting with prefix, in number order"""
+        self._prepare(cooldown)
+        with self._lock:
+            self._promote_cooled(cooldown)
+            ranges = list(self._ranges(prefix, country_code))
+            total = sum(hi - lo for _, lo, hi in ranges)
+            if len(ranges) == 1:
+                entries, lo, hi = ranges[0]
+                page = entries[lo + offset:min(lo + offset + limit, hi)]
+            else:
+                # map() binds each array now; a nested generator would read the last one
+                merged = heapq.merge(*(
+                    map(entries.__getitem__, range(lo, hi)) for entries, lo, hi in ranges
+                ))
+                page = list(itertools.islice(merged, offset, offset + limit))
+        return total, [number_id for _, number_id in page]
+
+    def prefix_counts(self, prefix, cooldown, country_code=None):
+        """Get counts for each one-digit extension of prefix, for drill-down browsing"""
+        self._prepare(cooldown)
+        with self._lock:
+            self._promote_cooled(cooldown)
+            counts = {}
+            for digit in '0123456789':
+                extended = prefix + digit
+                count = sum(hi - lo for _, lo, hi in self._ranges(extended, country_code))
+                if count:
+                    counts[extended] = count
+            return counts
+
+# Global prefix index instance
+prefix_index = PrefixIndex()
@@ -0,0 +1,242 @@
+import logging
+import math
+import threading
+import time
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from src.utils.webhook_signatures import webhook_verifier
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional for local development
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_monotonic = time.monotonic
+
+class MemoryRateLimitBackend:
+    """Process-local token buckets.
+
+    Limits are per process, so this backend is meant for single-worker
+    deployments, development and tests.
+    """
+
+    def __init__(self, sweep_interval=60):
+        self.sweep_interval = sweep_interval
+        self._buckets = {}  # key -> [tokens, updated_at, capacity, rate]
+        self._lock = threading.Lock()
+        self._swept_at = _monotonic()
+
+    def consume(self, key, capacity, rate):
+        """Take one token; returns (allowed, tokens_left)"""
+        # Hot path: locals and plain comparisons rather than min() and repeated indexing
+        now = _monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+                bucket = self._buckets[key] = [capacity, now, capacity, rate]
+            else:
+                tokens = bucket[0] + (now - bucket[1]) * rate
+                if tokens > capacity:
+                    tokens = capacity
+                bucket[1] = now
+                bucket[2] = capacity
+                bucket[3] = rate
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            bucket[0] = tokens
+
+            if now - self._swept_at > self.sweep_interval:
+                self._sweep(now)
+        return allowed, tokens
+
+    def _sweep(self, now):
+        # A bucket that has refilled completely behaves exactly like a new one
+        self._swept_at = now
+        full = [
+            key for key, (tokens, updated_at, capacity, rate) in self._buckets.items()
+            if tokens + (now - updated_at) * rate >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class RedisRateLimitBackend:
+    """Redis token buckets shared by every worker, updated atomically in a Lua script"""
+
+    key_prefix = 'ratelimit:'
+
+    # Uses the server clock so workers never disagree about elapsed time
+    script = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError('The redis package is required for a redis:// rate limit store')
+        self.client = redis.Redis.from_url(url)
+        self._consume = self.client.register_script(self.script)
+
+    def consume(self, key, capacity, rate):
+        allowed, tokens = self._consume(keys=[f'{self.key_prefix}{key}'], args=[capacity, rate])
+        return bool(allowed), float(tokens)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f'{self.key_prefix}*'))
+        if keys:
+            self.client.delete(*keys)
+
+class RateLimiter:
+    """Token-bucket request limits checked before routing.
+
+    Each scope allows ``limit`` requests per minute with bursts up to
+    ``limit``; the bucket refills continuously, so a check is O(1) with no
+    per-request history. Scopes:
+
+    - ``messages``: per user on /api/messages*
+    - ``auth``: per client IP on /api/auth/*
+    - ``webhook``: per provider on /api/webhooks/sms, using the provider's
+      ``rate_limit_per_minute`` from the webhook verifier's cached registry;
+      while signatures are verified, provider names not in the registry are
+      rejected without a query
+
+    Backend errors fail open so an unavailable store never blocks traffic.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.backend = MemoryRateLimitBackend()
+        self.limits = {'messages': 120, 'auth': 20, 'webhook': 100}
+        self._rejected = {}
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure limits and backend (RATE_LIMIT_STORAGE_URL memory:// or redis://...)"""
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.limits = {
+            'messages': app.config.get('RATE_LIMIT_MESSAGES_PER_MINUTE', self.limits['messages']),
+            'auth': app.config.get('RATE_LIMIT_AUTH_PER_MINUTE', self.limits['auth']),
+            'webhook': app.config.get('RATE_LIMIT_WEBHOOK_PER_MINUTE', self.limits['webhook'])
+        }
+        url = app.config.get('RATE_LIMIT_STORAGE_URL', 'memory://')
+        if url.startswith('redis://') or url.startswith('rediss://'):
+            self.backend = RedisRateLimitBackend(url)
+        else:
+            self.backend = MemoryRateLimitBackend()
+        app.before_request(self._before_request)
+
+    def _before_request(self):
+        if not self.enabled or request.method == 'OPTIONS':
+            return None
+
+        path = request.path
+        if path.startswith('/api/messages'):
+            scope, identity = 'messages', self._user_key()
+            limit = self.limits['messages']
+        elif path.startswith('/api/auth/'):
+            scope, identity = 'auth', self._ip_key()
+            limit = self.limits['auth']
+        elif path == '/api/webhooks/sms':
+            provider_name = request.args.get('provider', '').lower()
+            if not provider_name:
+                return None
+            scope, identity = 'webhook', f'provider:{provider_name}'
+            limit = self._provider_limit(provider_name)
+            if limit is None:
+                if webhook_verifier.enabled:
+                    # Same response the route gives an unverifiable webhook
+                    return jsonify({
+                        'error': 'Invalid webhook signature'
+                    }), 403
+                # With verification off the route accepts any provider name
+                limit = self.limits['webhook']
+        else:
+            return None
+
+        return self.check(f'{scope}:{identity}', limit, scope)
+
+    def check(self, key, limit, scope=None):
+        """Consume one request from key's per-minute budget; returns a 429 response or None"""
+        if not limit or limit <= 0:
+            return None
+
+        rate = limit / 60.0
+        try:
+            allowed, tokens = self.backend.consume(key, limit, rate)
+        except Exception as e:
+            logger.error(f'Rate limit store error: {str(e)}')
+            return None
+
+        if allowed:
+            return None
+
+        self._rejected[scope] = self._rejected.get(scope, 0) + 1
+        retry_after = max(1, int(math.ceil((1 - tokens) / rate)))
+        response = jsonify({
+            'error': 'Too Many Requests',
+            'message': f'Rate limit of {limit} requests per minute exceeded',
+            'code': 'RATE_LIMITED',
+            'retry_after': retry_after
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        response.headers['X-RateLimit-Limit'] = str(limit)
+        response.headers['X-RateLimit-Remaining'] = '0'
+        return response
+
+    @staticmethod
+    def _ip_key():
+        return f'ip:{request.remote_addr}'
+
+    def _user_key(self):
+        # Invalid tokens raise here and get the normal JWT error response
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+        return f'user:{user_id}' if user_id is not None else self._ip_key()
+
+    def _provider_limit(self, provider_name):
+        """Get an active provider's rate_limit_per_minute, or None for an unknown provider"""
+        try:
+            provider = webhook_verifier.get_provider(provider_name)
+        except Exception as e:
+            # Registry never loaded: fail open with the default limit
+            logger.error(f'Error loading webhook provider registry: {str(e)}')
+            return self.limits['webhook']
+        if provider is None:
+            return None
+        return provider['rate_limit_per_minute'] or self.limits['webhook']
+
+    def get_stats(self):
+        """Get configured limits and rejected request counts per scope"""
+        return {
+            'enabled': self.enabled,
+            'limits': dict(self.limits),
+            'rejected': dict(self._rejected)
+        }
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,24 @@
+from flask import Blueprint, request, jsonify
+from src.realtime.socket_manager import socket_manager
+from src.routes.admin import admin_required
+
+realtime_bp = Blueprint('realtime', __name__)
+
+@realtime_bp.route('/realtime/metrics', methods=['GET'])
+@admin_required
+def realtime_metrics():
+    """Get realtime layer metrics as JSON or Prometheus text (?format=prometheus)"""
+    try:
+        if request.args.get('format', '').lower() == 'prometheus':
+            return socket_manager.get_prometheus_metrics(), 200, {
+                'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'
+            }
+        
+        return jsonify(socket_manager.get_metrics()), 200
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal Server Error',
+            'message': 'An error occurred while collecting realtime metrics',
+            'code': 'METRICS_ERROR'
+        }), 500
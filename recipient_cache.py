@@ -0,0 +1,70 @@
+from collections import OrderedDict
+import threading
+import time
+
+class UnknownRecipientCache:
+    """Bounded negative cache of recipient numbers not in phone_numbers.
+
+    Webhooks for numbers we don't host are acked so providers stop
+    retrying; this cache lets repeats of the same unknown number skip the
+    phone_numbers lookup as well. Entries expire after ``ttl`` seconds and
+    are dropped as soon as the number is imported in this process, so the
+    TTL only bounds staleness for imports made by other workers.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # phone number -> expires_at (monotonic)
+        self._stats = {
+            'lookups_skipped': 0,
+            'acked': 0
+        }
+
+    def init_app(self, app):
+        self.ttl = app.config.get('UNKNOWN_RECIPIENT_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('UNKNOWN_RECIPIENT_CACHE_SIZE', self.max_size)
+
+    def contains(self, phone_number):
+        """Check if a number is known to be unknown"""
+        with self._lock:
+            expires_at = self._entries.get(phone_number)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._entries[phone_number]
+                return False
+            self._stats['lookups_skipped'] += 1
+            return True
+
+    def add(self, phone_number):
+        """Remember a number that was not found"""
+        with self._lock:
+            self._entries[phone_number] = time.monotonic() + self.ttl
+            self._entries.move_to_end(phone_number)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, phone_number):
+        with self._lock:
+            self._entries.pop(phone_number, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def record_ack(self):
+        """Count a webhook acked for an unknown recipient"""
+        with self._lock:
+            self._stats['acked'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = len(self._entries)
+        stats['ttl_seconds'] = self.ttl
+        return stats
+
+# Global unknown recipient cache instance
+unknown_recipients = UnknownRecipientCache()
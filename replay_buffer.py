@@ -0,0 +1,116 @@
+from collections import OrderedDict, deque
+import secrets
+import threading
+
+# A sequence number is (epoch << EPOCH_SHIFT) | counter. The epoch is random
+# per buffer, so numbers from another worker or an earlier process never
+# match; the whole value stays below 2**53 so JavaScript clients keep it exact.
+EPOCH_SHIFT = 32
+EPOCH_BITS = 20
+
+def seq_epoch(seq):
+    """Get the epoch a sequence number was allocated under"""
+    return seq >> EPOCH_SHIFT
+
+class ReplayBuffer:
+    """Per-room ring buffers of recent notifications for reconnect catch-up.
+
+    Every notification gets a sequence number from one process-wide counter
+    tagged with this buffer's epoch. A client that reconnects with the last
+    sequence it saw is sent only the notifications it missed. Each room
+    remembers a floor: the newest sequence it can no longer vouch for
+    (evicted, or marked as a gap). A last_seq below the floor, or from
+    another epoch (another worker, or before a restart), means events may
+    have been lost and the client must fall back to the REST API.
+
+    With ``shared=True`` (a message queue fanning emits out from several
+    workers) this buffer only sees its own worker's notifications, so a
+    replay is never reported complete.
+    """
+
+    def __init__(self, size=100, max_rooms=10000, shared=False):
+        self.size = size
+        self.max_rooms = max_rooms
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._new_epoch()
+
+    def _new_epoch(self):
+        self.epoch = secrets.randbits(EPOCH_BITS)
+        self._seq = self.epoch << EPOCH_SHIFT
+        self._start_seq = self._seq
+        self._evicted_floor = self._start_seq
+        self._rooms = OrderedDict()  # room -> {'floor': int, 'events': deque}
+
+    def next_seq(self):
+        """Allocate the next sequence number"""
+        with self._lock:
+            if self._seq - self._start_seq >= (1 << EPOCH_SHIFT) - 1:
+                # Counter exhausted: start over under a new epoch
+                self._new_epoch()
+            self._seq += 1
+            return self._seq
+
+    def record(self, rooms, seq, event, payload):
+        """Store one notification under every room it was sent to"""
+        with self._lock:
+            for room in rooms:
+                buffer = self._rooms.get(room)
+                if buffer is None:
+                    buffer = self._new_room(room)
+                else:
+                    self._rooms.move_to_end(room)
+
+                events = buffer['events']
+                if len(events) >= self.size:
+                    buffer['floor'] = events.popleft()[0]
+                events.append((seq, event, payload))
+
+    def mark_gap(self, rooms, seq):
+        """Note that seq was sent to rooms without being buffered"""
+        with self._lock:
+            for room in rooms:
+                buffer = self._rooms.get(room)
+                if buffer is None:
+                    self._new_room(room)['floor'] = seq
+                else:
+                    buffer['floor'] = max(buffer['floor'], seq)
+
+    def _new_room(self, room):
+        buffer = {'floor': self._evicted_floor, 'events': deque()}
+        self._rooms[room] = buffer
+        if len(self._rooms) > self.max_rooms:
+            _, evicted = self._rooms.popitem(last=False)
+            self._evicted_floor = max(self._evicted_floor, evicted['floor'])
+            if evicted['events']:
+                self._evicted_floor = max(self._evicted_floor, evicted['events'][-1][0])
+        return buffer
+
+    def since(self, room, last_seq, exclude_room=None):
+        """Get (complete, [(seq, event, payload)]) for events after last_seq.
+
+        Events also buffered for exclude_room are left out, for sockets
+        that will have them replayed from that room instead.
+        """
+        with self._lock:
+            if seq_epoch(last_seq) != self.epoch:
+                return False, []
+
+            buffer = self._rooms.get(room)
+            if buffer is None:
+                return last_seq >= self._evicted_floor and not self.shared, []
+
+            complete = last_seq >= buffer['floor'] and not self.shared
+            missed = [entry for entry in buffer['events'] if entry[0] > last_seq]
+
+            if exclude_room and missed:
+                excluded = self._rooms.get(exclude_room)
+                if excluded is not None:
+                    seen = {entry[0] for entry in excluded['events']}
+                    missed = [entry for entry in missed if entry[0] not in seen]
+
+            return complete, missed
+
+    def last_seq(self):
+        """Get the most recently allocated sequence number"""
+        return self._seq
@@ -0,0 +1,40 @@
+import json
+
+class PreSerialized:
+    """A payload encoded to JSON once and reused for every emit.
+
+    socket.io packets are encoded as ``[event, payload]``; dumps() below
+    splices the cached text in place of the payload instead of walking
+    the dict again for each room or batch it is sent to.
+    """
+
+    __slots__ = ('text',)
+
+    def __init__(self, obj):
+        self.text = json.dumps(obj, separators=(',', ':'))
+
+    @classmethod
+    def from_text(cls, text):
+        payload = cls.__new__(cls)
+        payload.text = text
+        return payload
+
+    def __getstate__(self):
+        return self.text
+
+    def __setstate__(self, state):
+        self.text = state
+
+def dumps(obj, **kwargs):
+    """json.dumps that writes PreSerialized packet arguments verbatim"""
+    if isinstance(obj, list) and any(isinstance(item, PreSerialized) for item in obj):
+        return '[' + ','.join(
+            item.text if isinstance(item, PreSerialized) else json.dumps(item, **kwargs)
+            for item in obj
+        ) + ']'
+    if isinstance(obj, PreSerialized):
+        return obj.text
+    return json.dumps(obj, **kwargs)
+
+def loads(s, **kwargs):
+    return json.loads(s, **kwargs)
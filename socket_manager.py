@@ -3,31 +3,97 @@ from flask import request
 from flask_jwt_extended import decode_token, get_jwt_identity
 import logging
 from datetime import datetime
+import functools
 import json
+import time
+from src.realtime.connection_registry import ConnectionRegistry
+from src.realtime.metrics import LatencyHistogram, CounterSet, EventRates, PrometheusWriter
+from src.realtime.coalescer import NotificationCoalescer, encode_batch
+from src.realtime.replay_buffer import ReplayBuffer
+from src.realtime import compact
+from src.realtime.compact import CompactPayload
+from src.realtime.dispatcher import NotificationDispatcher
+from src.realtime import serializer
+from src.realtime.serializer import PreSerialized
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Server modes Flask-SocketIO can run under; eventlet and gevent need the
+# standard library monkey patched at startup (see main.py)
+SUPPORTED_ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
 class SocketManager:
     def __init__(self, app=None):
         self.socketio = None
-        self.connected_users = {}  # user_id -> {socket_id, rooms}
-        self.user_rooms = {}  # user_id -> [room_names]
+        self.connections = ConnectionRegistry()  # sid <-> user_id, per-socket rooms
+        self.message_queue = None
+        self.publish_latency = LatencyHistogram()
+        self.emit_latency = {}  # event -> LatencyHistogram
+        self.emit_rates = EventRates()
+        self.handler_latency = {
+            name: LatencyHistogram()
+            for name in ('connect', 'disconnect', 'join_phone_room', 'leave_phone_room')
+        }
+        self.coalescer = None
+        self.dispatcher = None
+        self.replay = ReplayBuffer()
+        self.compact_enabled = False
+        self.presence_stats = CounterSet('delivered', 'skipped', 'room_emits', 'room_skips')
         
         if app:
             self.init_app(app)
     
     def init_app(self, app):
         """Initialize SocketIO with Flask app"""
+        # threading holds one OS thread per socket; eventlet/gevent serve
+        # thousands of idle sockets per process on green threads
+        async_mode = app.config.get('SOCKETIO_ASYNC_MODE', 'threading')
+        if async_mode not in SUPPORTED_ASYNC_MODES:
+            raise ValueError(f'Unsupported SOCKETIO_ASYNC_MODE: {async_mode}')
+        
+        # With a message queue every emit is published through it, so any
+        # worker's notification reaches the room's sockets on all workers
+        self.message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE') or None
+        
         self.socketio = SocketIO(
             app,
             cors_allowed_origins="*",
-            async_mode='threading',  # Use threading for deployment compatibility
-            logger=True,
-            engineio_logger=True
+            async_mode=async_mode,
+            message_queue=self.message_queue,
+            channel=app.config.get('SOCKETIO_CHANNEL', 'flask-socketio'),
+            json=serializer,
+            # Per-packet logging is expensive; enable only while debugging
+            logger=app.config.get('SOCKETIO_LOGGER', False),
+            engineio_logger=app.config.get('SOCKETIO_ENGINEIO_LOGGER', False)
+        )
+        
+        # Burst coalescing for message notifications; a window of 0 disables it
+        self.coalescer = NotificationCoalescer(
+            self._emit,
+            self.socketio.start_background_task,
+            self.socketio.sleep,
+            window=app.config.get('SOCKETIO_COALESCE_WINDOW_MS', 25) / 1000.0
+        )
+        
+        # Notifications are emitted off the request thread by a bounded queue worker
+        self.dispatcher = NotificationDispatcher(
+            max_size=app.config.get('SOCKETIO_DISPATCH_QUEUE_SIZE', 10000),
+            overflow=app.config.get('SOCKETIO_DISPATCH_OVERFLOW', 'drop_oldest')
+        )
+        self.dispatcher.start(self.socketio.start_background_task)
+        
+        # Recent notifications per room, replayed to reconnecting clients; behind a
+        # message queue other workers emit too, so replays cannot vouch for completeness
+        self.replay = ReplayBuffer(
+            size=app.config.get('SOCKETIO_REPLAY_BUFFER_SIZE', 100),
+            shared=bool(self.message_queue)
         )
         
+        # Clients may negotiate compact MessagePack payloads with auth {'format': 'compact'}
+        self.compact_enabled = app.config.get('SOCKETIO_COMPACT_FORMAT', True) and compact.is_available()
+        
         # Register event handlers
         self.register_handlers()
         
@@ -37,6 +103,7 @@ class SocketManager:
         """Register all socket event handlers"""
         
         @self.socketio.on('connect')
+        @self._timed('connect')
         def handle_connect(auth):
             """Handle client connection"""
             try:
@@ -59,20 +126,13 @@ class SocketManager:
                 
                 # Store user connection info
                 socket_id = request.sid
-                self.connected_users[user_id] = {
-                    'socket_id': socket_id,
-                    'connected_at': datetime.utcnow().isoformat(),
-                    'rooms': []
-                }
+                use_compact = self.compact_enabled and auth.get('format') == 'compact'
+                self.connections.register(socket_id, user_id, compact=use_compact)
                 
                 # Join user to their personal room
-                personal_room = f'user_{user_id}'
+                personal_room = self._socket_room(socket_id, f'user_{user_id}')
                 join_room(personal_room)
-                
-                if user_id not in self.user_rooms:
-                    self.user_rooms[user_id] = []
-                self.user_rooms[user_id].append(personal_room)
-                self.connected_users[user_id]['rooms'].append(personal_room)
+                self.connections.add_room(socket_id, personal_room)
                 
                 logger.info(f'User {user_id} connected with socket {socket_id}')
                 
@@ -80,9 +140,15 @@ class SocketManager:
                 emit('connected', {
                     'status': 'connected',
                     'user_id': user_id,
+                    'format': 'compact' if use_compact else 'json',
+                    'seq': self.replay.last_seq(),
                     'timestamp': datetime.utcnow().isoformat()
                 })
                 
+                # Replay anything missed since the client's last sequence
+                if auth.get('last_seq') is not None:
+                    self._replay(socket_id, personal_room, auth.get('last_seq'))
+                
                 return True
                 
             except Exception as e:
@@ -91,29 +157,21 @@ class SocketManager:
                 return False
         
         @self.socketio.on('disconnect')
+        @self._timed('disconnect')
         def handle_disconnect():
             """Handle client disconnection"""
             try:
                 socket_id = request.sid
                 
-                # Find and remove user from connected users
-                user_id = None
-                for uid, info in self.connected_users.items():
-                    if info['socket_id'] == socket_id:
-                        user_id = uid
-                        break
+                # Remove this socket from the registry
+                info = self.connections.unregister(socket_id)
                 
-                if user_id:
+                if info:
                     # Leave all rooms
-                    if user_id in self.user_rooms:
-                        for room in self.user_rooms[user_id]:
-                            leave_room(room)
-                        del self.user_rooms[user_id]
+                    for room in info['rooms']:
+                        leave_room(room)
                     
-                    # Remove from connected users
-                    del self.connected_users[user_id]
-                    
-                    logger.info(f'User {user_id} disconnected')
+                    logger.info(f'User {info["user_id"]} disconnected socket {socket_id}')
                 else:
                     logger.warning(f'Unknown socket {socket_id} disconnected')
                     
@@ -121,6 +179,7 @@ class SocketManager:
                 logger.error(f'Disconnect error: {str(e)}')
         
         @self.socketio.on('join_phone_room')
+        @self._timed('join_phone_room')
         def handle_join_phone_room(data):
             """Join room for specific phone number updates"""
             try:
@@ -129,23 +188,27 @@ class SocketManager:
                     emit('error', {'message': 'Phone number ID required'})
                     return
                 
-                room_name = f'phone_{phone_number_id}'
+                room_name = self._socket_room(request.sid, f'phone_{phone_number_id}')
                 join_room(room_name)
                 
-                # Update user rooms
-                user_id = self.get_user_id_from_socket(request.sid)
-                if user_id:
-                    if user_id not in self.user_rooms:
-                        self.user_rooms[user_id] = []
-                    if room_name not in self.user_rooms[user_id]:
-                        self.user_rooms[user_id].append(room_name)
-                        self.connected_users[user_id]['rooms'].append(room_name)
+                # Update socket rooms
+                self.connections.add_room(request.sid, room_name)
                 
                 emit('joined_room', {
                     'room': room_name,
                     'phone_number_id': phone_number_id
                 })
                 
+                # Replay missed phone room events not already replayed via the user room
+                if data.get('last_seq') is not None:
+                    user_id = self.get_user_id_from_socket(request.sid)
+                    self._replay(
+                        request.sid,
+                        room_name,
+                        data.get('last_seq'),
+                        exclude_room=self._socket_room(request.sid, f'user_{user_id}') if user_id else None
+                    )
+                
                 logger.info(f'User joined room {room_name}')
                 
             except Exception as e:
@@ -153,6 +216,7 @@ class SocketManager:
                 emit('error', {'message': 'Failed to join room'})
         
         @self.socketio.on('leave_phone_room')
+        @self._timed('leave_phone_room')
         def handle_leave_phone_room(data):
             """Leave room for specific phone number updates"""
             try:
@@ -161,15 +225,11 @@ class SocketManager:
                     emit('error', {'message': 'Phone number ID required'})
                     return
                 
-                room_name = f'phone_{phone_number_id}'
+                room_name = self._socket_room(request.sid, f'phone_{phone_number_id}')
                 leave_room(room_name)
                 
-                # Update user rooms
-                user_id = self.get_user_id_from_socket(request.sid)
-                if user_id and user_id in self.user_rooms:
-                    if room_name in self.user_rooms[user_id]:
-                        self.user_rooms[user_id].remove(room_name)
-                        self.connected_users[user_id]['rooms'].remove(room_name)
+                # Update socket rooms
+                self.connections.remove_room(request.sid, room_name)
                 
                 emit('left_room', {
                     'room': room_name,
@@ -187,78 +247,255 @@ class SocketManager:
             """Handle ping for connection health check"""
             emit('pong', {'timestamp': datetime.utcnow().isoformat()})
     
+    def _socket_room(self, sid, room):
+        """Get the room variant matching a socket's negotiated format"""
+        return compact.compact_room(room) if self.connections.is_compact(sid) else room
+    
+    def _timed(self, name):
+        """Decorator recording a socket event handler's run time"""
+        histogram = self.handler_latency[name]
+        
+        def decorator(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return handler(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+    
+    def _emit(self, event, data, **kwargs):
+        """Emit (or publish, when a message queue is configured) and record latency"""
+        if isinstance(data, CompactPayload):
+            # Raw bytes go out as a socket.io binary attachment
+            data = data.data
+        start = time.perf_counter()
+        try:
+            self.socketio.emit(event, data, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.publish_latency.observe(elapsed)
+            histogram = self.emit_latency.get(event)
+            if histogram is None:
+                histogram = self.emit_latency.setdefault(event, LatencyHistogram())
+            histogram.observe(elapsed)
+            self.emit_rates.record(event)
+    
+    def _has_subscribers(self, room):
+        """Check in O(1) whether emitting to a room can reach anyone.
+        
+        With a message queue the room may have members on other workers,
+        which this process cannot see, so every room counts as occupied.
+        """
+        if self.message_queue:
+            return True
+        return self.connections.room_has_members(room)
+    
+    def _deliver(self, event, user_id, phone_number_id, build_payload, build_compact=None, coalesce=False):
+        """Encode and send a notification to every socket in user_{id} or phone_{id} exactly once.
+        
+        The user room is exactly the user's own sockets, so the phone room emit
+        skips those sids; a tab that joined its own number's room is not sent
+        the same notification twice. Only sids connected to this process are
+        known, so sockets on other workers may still see both copies.
+        
+        Sockets using the compact format sit in the compact twin rooms. Each
+        format's payload is only built if one of its rooms has subscribers;
+        rooms nobody listens to are skipped and marked as a replay gap.
+        Returns True if anything was emitted.
+        """
+        seq = self.replay.next_seq()
+        send = self.coalescer.submit if coalesce else self._emit_room
+        
+        # (room, is_phone_room) targets
+        targets = []
+        if user_id:
+            targets.append((f'user_{user_id}', False))
+        if phone_number_id:
+            targets.append((f'phone_{phone_number_id}', True))
+        
+        formats = [(lambda room: room, build_payload)]
+        if self.compact_enabled and build_compact is not None:
+            formats.append((compact.compact_room, build_compact))
+        
+        skip_sid = None
+        delivered = False
+        for room_for, build in formats:
+            rooms = [(room_for(room), is_phone) for room, is_phone in targets]
+            live = [(room, is_phone) for room, is_phone in rooms if self._has_subscribers(room)]
+            self.presence_stats.incr('room_emits', len(live))
+            self.presence_stats.incr('room_skips', len(rooms) - len(live))
+            
+            if not live:
+                self.replay.mark_gap([room for room, _ in rooms], seq)
+                continue
+            
+            payload = build(seq)
+            for room, is_phone in live:
+                if is_phone and user_id:
+                    # Send to phone number room, minus the sockets reached via the user room
+                    if skip_sid is None:
+                        skip_sid = list(self.connections.get_sids(user_id))
+                    send(room, event, payload, skip_sid=skip_sid or None)
+                else:
+                    send(room, event, payload)
+            self.replay.record([room for room, _ in rooms], seq, event, payload)
+            delivered = True
+        
+        self.presence_stats.incr('delivered' if delivered else 'skipped')
+        return delivered
+    
+    def get_presence_metrics(self):
+        """Get how often notifications found subscribers versus were skipped"""
+        stats = self.presence_stats.snapshot()
+        total = stats['delivered'] + stats['skipped']
+        room_total = stats['room_emits'] + stats['room_skips']
+        stats['hit_ratio'] = round(stats['delivered'] / total, 4) if total else 0.0
+        stats['room_hit_ratio'] = round(stats['room_emits'] / room_total, 4) if room_total else 0.0
+        return stats
+    
+    def _emit_room(self, room, event, payload, skip_sid=None):
+        self._emit(event, payload, room=room, skip_sid=skip_sid)
+    
+    def _replay(self, sid, room, last_seq, exclude_room=None):
+        """Send a socket the buffered events it missed in a room"""
+        try:
+            last_seq = int(last_seq)
+        except (TypeError, ValueError):
+            emit('error', {'message': 'last_seq must be an integer'})
+            return
+        
+        complete, missed = self.replay.since(room, last_seq, exclude_room=exclude_room)
+        if missed:
+            self._emit(
+                self.coalescer.batch_event,
+                encode_batch([(event, payload) for _, event, payload in missed]),
+                to=sid
+            )
+        
+        # complete=False means events may be missing (buffer rolled over, or
+        # last_seq came from another worker or process): refetch over REST
+        self._emit('replay_complete', {
+            'room': room,
+            'complete': complete,
+            'replayed': len(missed),
+            'last_seq': self.replay.last_seq()
+        }, to=sid)
+    
+    def get_publish_metrics(self):
+        """Get emit/publish latency statistics"""
+        return {
+            'message_queue': 'enabled' if self.message_queue else 'disabled',
+            'publish_latency': self.publish_latency.snapshot()
+        }
+    
     def get_user_id_from_socket(self, socket_id):
         """Get user ID from socket ID"""
-        for user_id, info in self.connected_users.items():
-            if info['socket_id'] == socket_id:
-                return user_id
-        return None
+        return self.connections.get_user_id(socket_id)
     
     def notify_new_message(self, message_data):
+        """Queue a notification about a new SMS message"""
+        self.dispatcher.submit(
+            self._send_new_message,
+            message_data,
+            on_drop=lambda data: self._mark_dropped(data.get('user_id'), data.get('phone_number_id'))
+        )
+    
+    def notify_number_status_change(self, phone_number_data):
+        """Queue a notification about a phone number status change"""
+        # Only the latest status of a number matters, so queued updates merge;
+        # per user, so a release is not replaced by the next user's assignment
+        self.dispatcher.submit(
+            self._send_number_status_change,
+            phone_number_data,
+            merge_key=('number_status', phone_number_data.get('id'), phone_number_data.get('user_id')),
+            on_drop=lambda data: self._mark_dropped(data.get('user_id'), data.get('id'))
+        )
+    
+    def _mark_dropped(self, user_id, phone_number_id):
+        """Mark a replay gap in the rooms of a notification the dispatcher dropped.
+        
+        The dropped notification never got a sequence number, so a fresh one
+        stands in for it: clients that reconnect from before it are told to
+        resync instead of being replayed a history with a hole in it.
+        """
+        rooms = []
+        if user_id:
+            rooms.append(f'user_{user_id}')
+        if phone_number_id:
+            rooms.append(f'phone_{phone_number_id}')
+        if self.compact_enabled:
+            rooms += [compact.compact_room(room) for room in rooms]
+        if rooms:
+            self.replay.mark_gap(rooms, self.replay.next_seq())
+    
+    def get_dispatcher_metrics(self):
+        """Get notification queue depth, drops and emit latency"""
+        return self.dispatcher.get_metrics() if self.dispatcher else {}
+    
+    def _send_new_message(self, message_data):
         """Notify users about new SMS message"""
         try:
             phone_number_id = message_data.get('phone_number_id')
             user_id = message_data.get('user_id')
             
-            # Prepare notification data
-            notification = {
-                'type': 'new_message',
-                'message': {
-                    'id': message_data.get('id'),
-                    'phone_number': message_data.get('phone_number'),
-                    'sender_number': message_data.get('sender_number'),
-                    'message_content': message_data.get('message_content'),
-                    'message_type': message_data.get('message_type'),
-                    'received_at': message_data.get('received_at'),
-                    'is_read': message_data.get('is_read', False)
-                },
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            # Send to user's personal room
-            if user_id:
-                personal_room = f'user_{user_id}'
-                self.socketio.emit('message_notification', notification, room=personal_room)
-                logger.info(f'Sent message notification to user {user_id}')
+            def build_payload(seq):
+                # Prepare notification data, encoded once for every room
+                return PreSerialized({
+                    'type': 'new_message',
+                    'seq': seq,
+                    'message': {
+                        'id': message_data.get('id'),
+                        'phone_number': message_data.get('phone_number'),
+                        'sender_number': message_data.get('sender_number'),
+                        'message_content': message_data.get('message_content'),
+                        'message_type': message_data.get('message_type'),
+                        'received_at': message_data.get('received_at'),
+                        'is_read': message_data.get('is_read', False)
+                    },
+                    'timestamp': datetime.utcnow().isoformat()
+                })
             
-            # Send to phone number room
-            if phone_number_id:
-                phone_room = f'phone_{phone_number_id}'
-                self.socketio.emit('message_notification', notification, room=phone_room)
-                logger.info(f'Sent message notification to phone room {phone_number_id}')
+            # Bursts are coalesced per room into message_batch events
+            if self._deliver(
+                'message_notification', user_id, phone_number_id,
+                build_payload,
+                lambda seq: compact.compact_message(seq, message_data),
+                coalesce=True
+            ):
+                logger.info(f'Sent message notification to user {user_id} / phone room {phone_number_id}')
             
         except Exception as e:
             logger.error(f'Error sending message notification: {str(e)}')
     
-    def notify_number_status_change(self, phone_number_data):
+    def _send_number_status_change(self, phone_number_data):
         """Notify users about phone number status changes"""
         try:
             phone_number_id = phone_number_data.get('id')
             user_id = phone_number_data.get('user_id')
             
-            notification = {
-                'type': 'number_status_change',
-                'phone_number': {
-                    'id': phone_number_id,
-                    'phone_number': phone_number_data.get('phone_number'),
-                    'status': phone_number_data.get('status'),
-                    'expires_at': phone_number_data.get('expires_at'),
-                    'assigned_at': phone_number_data.get('assigned_at')
-                },
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-            # Send to user's personal room
-            if user_id:
-                personal_room = f'user_{user_id}'
-                self.socketio.emit('number_status_notification', notification, room=personal_room)
-                logger.info(f'Sent number status notification to user {user_id}')
+            def build_payload(seq):
+                return PreSerialized({
+                    'type': 'number_status_change',
+                    'seq': seq,
+                    'phone_number': {
+                        'id': phone_number_id,
+                        'phone_number': phone_number_data.get('phone_number'),
+                        'status': phone_number_data.get('status'),
+                        'expires_at': phone_number_data.get('expires_at'),
+                        'assigned_at': phone_number_data.get('assigned_at')
+                    },
+                    'timestamp': datetime.utcnow().isoformat()
+                })
             
-            # Send to phone number room
-            if phone_number_id:
-                phone_room = f'phone_{phone_number_id}'
-                self.socketio.emit('number_status_notification', notification, room=phone_room)
-                logger.info(f'Sent number status notification to phone room {phone_number_id}')
+            if self._deliver(
+                'number_status_notification', user_id, phone_number_id,
+                build_payload,
+                lambda seq: compact.compact_number_status(seq, phone_number_data)
+            ):
+                logger.info(f'Sent number status notification to user {user_id} / phone room {phone_number_id}')
             
         except Exception as e:
             logger.error(f'Error sending number status notification: {str(e)}')
@@ -273,23 +510,83 @@ class SocketManager:
                 'timestamp': datetime.utcnow().isoformat()
             }
             
-            self.socketio.emit('system_notification', notification, broadcast=True)
+            self._emit('system_notification', notification, broadcast=True)
             logger.info(f'Broadcasted system message: {message}')
             
         except Exception as e:
             logger.error(f'Error broadcasting system message: {str(e)}')
     
+    def get_metrics(self):
+        """Get a snapshot of realtime layer metrics"""
+        return {
+            'connections': {
+                'sockets': self.connections.connection_count(),
+                'users': self.connections.user_count(),
+                'rooms': self.connections.room_count()
+            },
+            'emits': self.emit_rates.snapshot(),
+            'emit_latency': {event: histogram.snapshot() for event, histogram in list(self.emit_latency.items())},
+            'publish': self.get_publish_metrics(),
+            'dispatcher': self.get_dispatcher_metrics(),
+            'coalescer': {
+                'pending': self.coalescer.pending_count() if self.coalescer else 0
+            },
+            'presence': self.get_presence_metrics(),
+            'handlers': {name: histogram.snapshot() for name, histogram in self.handler_latency.items()}
+        }
+    
+    def get_prometheus_metrics(self):
+        """Render realtime layer metrics in the Prometheus text format"""
+        metrics = self.get_metrics()
+        writer = PrometheusWriter(prefix='disposms_realtime_')
+        
+        connections = metrics['connections']
+        writer.sample('connected_sockets', connections['sockets'], help_text='Open Socket.IO connections')
+        writer.sample('connected_users', connections['users'], help_text='Distinct users with an open connection')
+        writer.sample('rooms', connections['rooms'], help_text='Rooms with at least one local socket')
+        
+        for event, stats in metrics['emits'].items():
+            writer.sample('emits_total', stats['total'], 'counter', {'event': event}, 'Emits by event')
+            writer.sample('emits_per_second', stats['per_second'], labels={'event': event},
+                          help_text='Emit rate by event over the last minute')
+        for event, snapshot in metrics['emit_latency'].items():
+            writer.histogram('emit_latency_ms', snapshot, {'event': event}, 'Emit/publish latency by event')
+        
+        dispatcher = metrics['dispatcher']
+        if dispatcher:
+            writer.sample('dispatch_queue_depth', dispatcher['depth'], help_text='Queued notifications')
+            writer.sample('dispatch_queue_capacity', dispatcher['capacity'])
+            for name in ('enqueued', 'processed', 'merged', 'dropped', 'errors'):
+                writer.sample(f'dispatch_{name}_total', dispatcher[name], 'counter')
+            writer.histogram('dispatch_queue_wait_ms', dispatcher['queue_wait'],
+                             help_text='Time notifications wait in the dispatch queue')
+        writer.sample('coalescer_pending', metrics['coalescer']['pending'],
+                      help_text='Notifications buffered for coalescing')
+        
+        presence = metrics['presence']
+        for name in ('delivered', 'skipped', 'room_emits', 'room_skips'):
+            writer.sample(f'presence_{name}_total', presence[name], 'counter')
+        
+        for name, snapshot in metrics['handlers'].items():
+            writer.histogram('handler_latency_ms', snapshot, {'handler': name}, 'Socket event handler run time')
+        
+        return writer.render()
+    
     def get_connected_users_count(self):
         """Get count of connected users"""
-        return len(self.connected_users)
+        return self.connections.user_count()
+    
+    def get_connected_sockets_count(self):
+        """Get count of open sockets across all users"""
+        return self.connections.connection_count()
     
     def get_user_connection_info(self, user_id):
-        """Get connection info for specific user"""
-        return self.connected_users.get(user_id)
+        """Get connection info for every socket of a specific user"""
+        return self.connections.get_user_connections(user_id)
     
     def is_user_connected(self, user_id):
         """Check if user is connected"""
-        return user_id in self.connected_users
+        return self.connections.is_user_connected(user_id)
 
 # Global socket manager instance
 socket_manager = SocketManager()
@@ -0,0 +1,44 @@
+from flask_jwt_extended import decode_token
+
+EMAIL = 'tester@example.com'
+PASSWORD = 'Passw0rdOK'
+
+def register_and_login(client):
+    response = client.post('/api/auth/register', json={'email': EMAIL, 'password': PASSWORD})
+    assert response.status_code == 201
+    response = client.post('/api/auth/login', json={'email': EMAIL, 'password': PASSWORD})
+    assert response.status_code == 200
+    return response.get_json()
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_login_refresh_logout(client):
+    tokens = register_and_login(client)
+    user_id = tokens['user']['id']
+
+    # Subjects are strings, as PyJWT requires
+    assert decode_token(tokens['access_token'])['sub'] == str(user_id)
+    assert decode_token(tokens['refresh_token'])['sub'] == str(user_id)
+    assert client.get('/api/auth/profile', headers=bearer(tokens['access_token'])).status_code == 200
+
+    response = client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token']))
+    assert response.status_code == 200
+    refreshed = response.get_json()
+    assert refreshed['refresh_token'] != tokens['refresh_token']
+
+    # Refresh tokens are single use
+    response = client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token']))
+    assert response.status_code == 401
+
+    response = client.post(
+        '/api/auth/logout',
+        json={'refresh_token': refreshed['refresh_token']},
+        headers=bearer(refreshed['access_token'])
+    )
+    assert response.status_code == 200
+
+    # Both the access token and the refresh session are gone
+    assert client.get('/api/auth/profile', headers=bearer(refreshed['access_token'])).status_code == 401
+    response = client.post('/api/auth/refresh', headers=bearer(refreshed['refresh_token']))
+    assert response.status_code == 401
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime
+import msgpack
+from src.realtime import compact
+from src.realtime.serializer import PreSerialized, dumps
+
+MESSAGE = {
+    'id': 42,
+    'phone_number_id': 7,
+    'phone_number': '+14155550100',
+    'sender_number': '+12025550123',
+    'message_content': 'Your code is 123456',
+    'message_type': 'otp',
+    'received_at': '2026-10-19T06:30:15.250000',
+    'is_read': False
+}
+
+STATUS = {
+    'id': 7,
+    'phone_number': '+14155550100',
+    'status': 'assigned',
+    'expires_at': '2026-10-19T07:30:15',
+    'assigned_at': '2026-10-19T06:30:15'
+}
+
+def unpack(payload):
+    return msgpack.unpackb(payload.data, raw=False)
+
+def from_epoch_ms(value):
+    return datetime.utcfromtimestamp(value / 1000)
+
+def test_message_round_trip():
+    decoded = unpack(compact.compact_message(9, MESSAGE))
+
+    assert decoded == {
+        's': 9, 'i': 42, 'p': 7, 'n': '+14155550100', 'f': '+12025550123',
+        'c': 'Your code is 123456', 'k': 'o', 'r': decoded['r'], 'u': False
+    }
+    assert from_epoch_ms(decoded['r']) == datetime.fromisoformat(MESSAGE['received_at'])
+
+def test_number_status_round_trip():
+    decoded = unpack(compact.compact_number_status(10, STATUS))
+
+    assert decoded['s'] == 10 and decoded['i'] == 7 and decoded['st'] == 'assigned'
+    assert from_epoch_ms(decoded['x']) == datetime.fromisoformat(STATUS['expires_at'])
+    assert from_epoch_ms(decoded['a']) == datetime.fromisoformat(STATUS['assigned_at'])
+
+def test_missing_timestamps_stay_empty():
+    decoded = unpack(compact.compact_number_status(11, {'id': 7, 'status': 'available'}))
+
+    assert decoded['x'] is None and decoded['a'] is None
+
+def test_batch_round_trip():
+    items = [
+        ('message_notification', compact.compact_message(1, MESSAGE)),
+        ('number_status_notification', compact.compact_number_status(2, STATUS))
+    ]
+
+    decoded = unpack(compact.encode_compact_batch(items))
+
+    assert decoded == [['m', unpack(items[0][1])], ['n', unpack(items[1][1])]]
+
+def test_large_batch_uses_wide_array_header():
+    items = [('message_notification', compact.compact_message(seq, MESSAGE)) for seq in range(20)]
+
+    decoded = unpack(compact.encode_compact_batch(items))
+
+    assert [payload['s'] for _, payload in decoded] == list(range(20))
+
+def test_pre_serialized_packet_matches_json():
+    payload = {'type': 'new_message', 'seq': 3, 'message': MESSAGE}
+
+    packet = dumps(['message_notification', PreSerialized(payload)])
+
+    assert json.loads(packet) == ['message_notification', payload]
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+import pytest
+from src.models.message import Message
+from src.models.phone_number import PhoneNumber
+from src.models.sms_provider import SMSProvider
+from src.models.user import db
+from src.routes.webhooks import replay_spooled_webhook
+from src.utils.flood_guard import ALLOW, DROP, SUMMARIZE, FloodGuard, flood_guard
+from src.utils.webhook_spool import WebhookSpool
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setattr(flood_guard, 'max_messages', 3)
+    monkeypatch.setattr(flood_guard, 'window', 10 ** 9)  # one window for the whole test
+    monkeypatch.setattr(flood_guard, 'policy', 'summarize')
+    monkeypatch.setattr(flood_guard, '_pairs', OrderedDict())
+    monkeypatch.setattr(flood_guard, '_replayed', OrderedDict())
+    return flood_guard
+
+def test_replayed_messages_are_counted_apart_from_live_ones():
+    guard = FloodGuard(window=60, max_messages=2, policy='drop')
+    received_at = 1_700_000_000
+
+    assert [guard.check('+1', '+2') for _ in range(2)] == [ALLOW, ALLOW]
+    assert [guard.check('+1', '+2', received_at + i) for i in range(3)] == [ALLOW, ALLOW, DROP]
+    # A record from another worker's segment, older than the pair's window
+    assert guard.check('+1', '+2', received_at - 120) == DROP
+    assert guard.check('+1', '+2') == DROP
+
+def test_replaying_a_spooled_flood(app, guard, tmp_path):
+    db.session.add(SMSProvider(name='acme', api_endpoint='https://acme.example', is_active=True))
+    db.session.commit()
+    PhoneNumber.import_numbers(['+15550100001'], country_code='US')
+
+    spool = WebhookSpool(app)
+    spool.directory = str(tmp_path)
+    spool.handler = replay_spooled_webhook
+    spool.rate = 0
+    for i in range(6):
+        spool.append('acme', {'from': '+15559990000', 'to': '+15550100001', 'message': f'spam {i}', 'id': f'm{i}'})
+    with spool._lock:
+        spool._seal()
+
+    assert spool.replay_pending() == 6
+
+    contents = [message.message_content for message in Message.query.order_by(Message.id).all()]
+    assert contents == ['spam 0', 'spam 1', 'spam 2', guard.summary_text('+15559990000')]
+    assert spool.get_stats()['replayed'] == 6
+    assert ('+15559990000', '+15550100001') not in guard._pairs
+    assert guard.check('+15559990000', '+15550100001') == ALLOW
+
+def test_live_flood_is_summarized_then_dropped(guard):
+    assert [guard.check('+1', '+2') for _ in range(6)] == [ALLOW, ALLOW, ALLOW, SUMMARIZE, DROP, DROP]
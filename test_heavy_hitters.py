@@ -0,0 +1,39 @@
+import math
+import random
+from collections import Counter
+from src.utils.heavy_hitters import RollingHeavyHitters, TrafficSketches
+
+def zipf_stream(rng, events, keys, exponent=1.2):
+    """Skewed stream of integer keys, key 0 the most frequent"""
+    weights = [1 / (rank + 1) ** exponent for rank in range(keys)]
+    return rng.choices(range(keys), weights, k=events)
+
+def test_top_matches_exact_counts_on_skewed_stream():
+    random.seed(1234)  # sketch row seeds
+    rng = random.Random(1234)
+    epsilon = 0.001
+    window = RollingHeavyHitters(300, 5, k=20, epsilon=epsilon, delta=0.01)
+    stream = zipf_stream(rng, 50000, 5000)
+    exact = Counter()
+
+    # Spread the stream over every slot of the window
+    for i, key in enumerate(stream):
+        window.add(key, now=i * 300 / len(stream))
+        exact[key] += 1
+
+    total, top = window.top(now=299, n=10)
+
+    assert total == len(stream)
+    assert [key for key, _ in top] == [key for key, _ in exact.most_common(10)]
+    for key, estimate in top:
+        assert exact[key] <= estimate <= exact[key] + epsilon * total
+
+def test_confidence_holds_across_slots():
+    sketches = TrafficSketches(k=10, epsilon=0.001, delta=0.01)
+
+    for window, (_, slots) in TrafficSketches.WINDOWS.items():
+        rolling = sketches._sketches[('sender', window)]
+        # Union bound over the slots: each slot fails with at most delta / slots
+        for slot in rolling._slots:
+            assert slot.sketch.depth == math.ceil(math.log(slots / 0.01))
+        assert sketches.top(window)['confidence'] == 1 - 0.01
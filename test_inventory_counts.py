@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from src.models.inventory_counts import inventory_counts
+from src.models.phone_number import PhoneNumber
+from src.models.user import User, db
+
+def make_user():
+    user = User(email='a@example.com', password_hash='unused')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def count_queries():
+    statements = []
+    def before_execute(conn, cursor, statement, *args):
+        if 'count(' in statement.lower():
+            statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+def test_unfiltered_total_comes_from_cached_counts(client):
+    user = make_user()
+    PhoneNumber.import_numbers(['+15550100001', '+15550100002'], country_code='US')
+    assigned = PhoneNumber.import_numbers(['+447700900001'], country_code='GB')[0]
+    assigned.assign_to_user(user.id, 1)
+
+    statements, stop = count_queries()
+    try:
+        everything = client.get('/api/numbers', query_string={'status': ''}).get_json()
+        gb = client.get('/api/numbers', query_string={'status': '', 'country_code': 'gb'}).get_json()
+    finally:
+        stop()
+
+    assert everything['total'] == 3
+    assert len(everything['numbers']) == 3
+    assert gb['total'] == 1
+    assert statements == []
+
+def test_cleanup_reclassifies_cooled_numbers(app):
+    user = make_user()
+    numbers = PhoneNumber.import_numbers(['+15550100001', '+15550100002'], country_code='US')
+    numbers[0].assign_to_user(user.id, 1)
+    numbers[0].release()
+    assert PhoneNumber.count_available('US') == 1
+
+    # Released long enough ago that the cooldown has passed
+    inventory_counts._cooling['US'][0] -= PhoneNumber.get_cooldown() + timedelta(seconds=1)
+    numbers[1].assign_to_user(user.id, 1)
+    numbers[1].expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert PhoneNumber.cleanup_expired() == 1
+
+    # The earlier release is ready again; the one just made is cooling
+    assert list(inventory_counts._cooling['US']) == [numbers[1].released_at]
+    assert PhoneNumber.count_available('US') == 1
+    assert PhoneNumber.count_by_status('available', 'US') == 1
+    assert PhoneNumber.count_by_status(None, 'US') == 2
+
+def test_cooled_numbers_are_reclassified_on_read(app):
+    user = make_user()
+    number = PhoneNumber.import_numbers(['+15550100001'], country_code='US')[0]
+    number.assign_to_user(user.id, 1)
+    number.release()
+    assert PhoneNumber.count_available() == 0
+
+    app.config['NUMBER_COOLDOWN_SECONDS'] = 0
+    try:
+        assert PhoneNumber.count_available() == 1
+    finally:
+        app.config.pop('NUMBER_COOLDOWN_SECONDS')
+    assert not inventory_counts._cooling['US']
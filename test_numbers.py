@@ -0,0 +1,48 @@
+from flask_jwt_extended import create_access_token
+from src.models.lease_store import lease_store
+from src.models.phone_number import PhoneNumber
+from src.models.user import User, db
+
+def make_user(email):
+    user = User(email=email, password_hash='unused')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+def auth(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+def test_stale_lease_does_not_lock_out_the_owner(client):
+    owner = make_user('owner@example.com')
+    previous = make_user('previous@example.com')
+    number = PhoneNumber.import_numbers(['+15550100001'], country_code='US')[0]
+    number.assign_to_user(owner.id, 1)
+
+    # A lease left over from an earlier assignment, e.g. a failed write-through
+    lease_store.grant(number.id, previous.id, number.expires_at)
+
+    assert client.get(f'/api/numbers/{number.id}', headers=auth(owner)).status_code == 200
+    assert lease_store.holder(number.id) == owner.id
+
+    lease_store.grant(number.id, previous.id, number.expires_at)
+    assert PhoneNumber.is_owned_by(number.id, owner.id)
+    assert lease_store.holder(number.id) == owner.id
+
+    lease_store.grant(number.id, previous.id, number.expires_at)
+    response = client.post(f'/api/numbers/{number.id}/extend', json={'additional_hours': 2}, headers=auth(owner))
+    assert response.status_code == 200
+
+    lease_store.grant(number.id, previous.id, number.expires_at)
+    assert client.delete(f'/api/numbers/{number.id}', headers=auth(owner)).status_code == 200
+    assert lease_store.holder(number.id) is None
+
+def test_stale_lease_does_not_grant_access(client):
+    owner = make_user('owner@example.com')
+    previous = make_user('previous@example.com')
+    number = PhoneNumber.import_numbers(['+15550100001'], country_code='US')[0]
+    number.assign_to_user(owner.id, 1)
+    lease_store.grant(number.id, previous.id, number.expires_at)
+
+    assert client.get(f'/api/numbers/{number.id}', headers=auth(previous)).status_code == 403
+    assert client.delete(f'/api/numbers/{number.id}', headers=auth(previous)).status_code == 403
+    assert PhoneNumber.query.get(number.id).user_id == owner.id
@@ -0,0 +1,73 @@
+import threading
+import bcrypt
+import pytest
+from flask import Flask
+from src.models.user import User, db
+from src.utils.password_hasher import HasherBusy, PasswordHasher, password_hasher
+
+def make_hasher(pool_size, max_pending, rounds=4):
+    app = Flask(__name__)
+    app.config.update(BCRYPT_ROUNDS=rounds, BCRYPT_POOL_SIZE=pool_size, BCRYPT_MAX_PENDING=max_pending)
+    return PasswordHasher(app)
+
+def test_hash_and_verify():
+    hasher = make_hasher(pool_size=2, max_pending=4)
+
+    hashed = hasher.hash('Passw0rdOK')
+
+    assert hasher.verify('Passw0rdOK', hashed)
+    assert not hasher.verify('wrong', hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert hasher.needs_rehash(bcrypt.hashpw(b'Passw0rdOK', bcrypt.gensalt(5)).decode())
+
+def test_full_pool_rejects_instead_of_queueing():
+    hasher = make_hasher(pool_size=1, max_pending=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    # One call running on the worker takes the only slot
+    holder = threading.Thread(target=hasher._run, args=(hold,))
+    holder.start()
+    assert started.wait(5)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash('Passw0rdOK')
+    finally:
+        release.set()
+        holder.join()
+
+    # Slots are returned once the work finishes
+    assert hasher.verify('Passw0rdOK', hasher.hash('Passw0rdOK'))
+
+def test_login_when_pool_is_full(client):
+    db.session.add(User(email='a@example.com', password_hash=password_hasher.hash('Passw0rdOK')))
+    db.session.commit()
+    for _ in range(password_hasher.max_pending):
+        password_hasher._slots.acquire()
+    try:
+        response = client.post('/api/auth/login', json={'email': 'a@example.com', 'password': 'Passw0rdOK'})
+    finally:
+        for _ in range(password_hasher.max_pending):
+            password_hasher._slots.release()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert response.get_json()['code'] == 'AUTH_BUSY'
+
+def test_login_rehashes_at_configured_cost(client):
+    old_hash = bcrypt.hashpw(b'Passw0rdOK', bcrypt.gensalt(password_hasher.rounds + 1)).decode()
+    user = User(email='a@example.com', password_hash=old_hash)
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post('/api/auth/login', json={'email': 'a@example.com', 'password': 'Passw0rdOK'})
+
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash != old_hash
+    assert not password_hasher.needs_rehash(user.password_hash)
+    assert password_hasher.verify('Passw0rdOK', user.password_hash)
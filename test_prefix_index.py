@@ -0,0 +1,83 @@
+import random
+from datetime import datetime
+from src.models.phone_number import PhoneNumber
+from src.models.prefix_index import PrefixIndex, prefix_index
+from src.models.user import User, db
+
+def search(client, **params):
+    response = client.get('/api/numbers', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def numbers_of(body):
+    return [number['phone_number'] for number in body['numbers']]
+
+def test_prefix_search(client):
+    PhoneNumber.import_numbers(['+15550100003', '+15550100001', '+15550200001', '+15560100001'], country_code='US')
+    PhoneNumber.import_numbers(['+15550100002'], country_code='CA')
+
+    body = search(client, prefix='1555-01', country_code='us')
+    assert body['prefix'] == '+155501'
+    assert body['total'] == 2
+    assert numbers_of(body) == ['+15550100001', '+15550100003']
+
+    # Across countries the per-country slices are merged in number order
+    body = search(client, prefix='+15550', limit=2, offset=1)
+    assert body['total'] == 4
+    assert numbers_of(body) == ['+15550100002', '+15550100003']
+    assert body['prefix_counts'] == {'+155501': 3, '+155502': 1}
+
+    response = client.get('/api/numbers', query_string={'prefix': '+1555', 'status': 'assigned'})
+    assert response.status_code == 400
+
+def test_assign_and_release_update_the_index(client, app):
+    user = User(email='a@example.com', password_hash='unused')
+    db.session.add(user)
+    db.session.commit()
+    number = PhoneNumber.import_numbers(['+15550100001'], country_code='US')[0]
+
+    number.assign_to_user(user.id, 1)
+    assert search(client, prefix='+1555')['total'] == 0
+
+    # Released numbers stay out of the index until their cooldown passes
+    number.release()
+    assert search(client, prefix='+1555')['total'] == 0
+    app.config['NUMBER_COOLDOWN_SECONDS'] = 0
+    try:
+        assert numbers_of(search(client, prefix='+1555')) == ['+15550100001']
+    finally:
+        app.config.pop('NUMBER_COOLDOWN_SECONDS')
+
+def test_writes_from_other_workers_appear_after_reconcile(client):
+    PhoneNumber.import_numbers(['+15550100001'], country_code='US')
+    # Inserted without touching this process's index, as another worker would
+    db.session.add(PhoneNumber(phone_number='+15550100002', country_code='US', status='available'))
+    db.session.commit()
+
+    assert search(client, prefix='+1555')['total'] == 1
+
+    prefix_index._last_reconciled -= prefix_index.reconcile_interval
+    assert numbers_of(search(client, prefix='+1555')) == ['+15550100001', '+15550100002']
+
+def test_bulk_import_keeps_the_index_sorted(client):
+    PhoneNumber.import_numbers(['+15550100500', '+15559999999'], country_code='US')
+    batch = [f'+1555{i:07d}' for i in range(0, 20000, 7)]
+    random.shuffle(batch)
+
+    PhoneNumber.import_numbers(batch, country_code='US')
+
+    entries = prefix_index._numbers['US']
+    assert [phone_number for phone_number, _ in entries] == sorted(batch + ['+15550100500', '+15559999999'])
+    assert search(client, prefix='+15550000')['total'] == len([n for n in batch if n.startswith('+15550000')])
+
+def test_add_many_merges_into_existing_entries():
+    index = PrefixIndex()
+    index._last_reconciled = float('inf')
+    index.add('+15550000005', 5, 'US')
+    index.add('+15550000009', 9, 'US', released_at=datetime.utcnow())
+
+    index.add_many([('+15550000007', 7), ('+15550000001', 1), ('+15550000003', 3)], 'US')
+
+    assert index._numbers['US'] == [
+        ('+15550000001', 1), ('+15550000003', 3), ('+15550000005', 5), ('+15550000007', 7)
+    ]
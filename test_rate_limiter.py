@@ -0,0 +1,67 @@
+import pytest
+from src.models.sms_provider import SMSProvider
+from src.models.user import db
+from src.utils.rate_limiter import MemoryRateLimitBackend, rate_limiter
+from src.utils.webhook_signatures import webhook_verifier
+
+@pytest.fixture
+def limiter(app, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'enabled', True)
+    monkeypatch.setitem(rate_limiter.limits, 'webhook', 2)
+    rate_limiter.backend.clear()
+    webhook_verifier.invalidate()
+    yield rate_limiter
+    rate_limiter.backend.clear()
+    webhook_verifier.invalidate()
+
+def test_bucket_allows_a_burst_then_refills(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('src.utils.rate_limiter._monotonic', lambda: clock[0])
+    backend = MemoryRateLimitBackend()
+
+    assert [backend.consume('k', 3, 1.0)[0] for _ in range(4)] == [True, True, True, False]
+    clock[0] += 1.0
+    assert backend.consume('k', 3, 1.0)[0]
+    assert not backend.consume('k', 3, 1.0)[0]
+
+def test_sweep_drops_refilled_buckets(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('src.utils.rate_limiter._monotonic', lambda: clock[0])
+    backend = MemoryRateLimitBackend(sweep_interval=60)
+    backend.consume('idle', 3, 1.0)
+
+    clock[0] += 61
+    backend.consume('active', 3, 1.0)
+
+    assert list(backend._buckets) == ['active']
+
+def test_rejection_has_retry_after(app, limiter):
+    with app.test_request_context():
+        assert limiter.check('auth:ip:1', 1, 'auth') is None
+        response = limiter.check('auth:ip:1', 1, 'auth')
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '60'
+    assert response.get_json()['code'] == 'RATE_LIMITED'
+
+def test_webhook_uses_the_provider_limit(client, limiter):
+    db.session.add(SMSProvider(name='acme', api_endpoint='https://acme.example', is_active=True, rate_limit_per_minute=1))
+    db.session.commit()
+
+    codes = [client.post('/api/webhooks/sms?provider=acme', data={}).status_code for _ in range(2)]
+
+    assert codes == [403, 429]  # unsigned, then over the provider's limit of 1
+
+def test_unknown_provider_rejected_while_verifying(client, limiter):
+    response = client.post('/api/webhooks/sms?provider=forged', data={})
+
+    assert response.status_code == 403
+    assert response.get_json() == {'error': 'Invalid webhook signature'}
+
+def test_unknown_provider_passes_to_route_without_verification(client, limiter, monkeypatch):
+    monkeypatch.setattr(webhook_verifier, 'enabled', False)
+
+    codes = [client.post('/api/webhooks/sms?provider=custom', data={}).status_code for _ in range(3)]
+
+    assert 403 not in codes
+    assert codes[2] == 429  # the default webhook limit of 2 still applies
@@ -0,0 +1,99 @@
+from collections import Counter
+from src.realtime.connection_registry import ConnectionRegistry
+from src.realtime.dispatcher import NotificationDispatcher
+from src.realtime.socket_manager import SocketManager
+
+class RecordingSocketIO:
+    """Stands in for SocketIO.emit, expanding rooms to sids the way the server does"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.sids = set()
+        self.deliveries = Counter()  # (sid, event) -> times delivered
+
+    def emit(self, event, data, room=None, to=None, skip_sid=None, **kwargs):
+        target = room or to
+        if isinstance(skip_sid, str):
+            skip_sid = [skip_sid]
+        skipped = set(skip_sid or ())
+        for sid in self.sids:
+            if sid == target or target in self.registry.get_rooms(sid):
+                if sid not in skipped:
+                    self.deliveries[(sid, event)] += 1
+
+def make_manager():
+    manager = SocketManager()
+    manager.connections = ConnectionRegistry()
+    manager.socketio = RecordingSocketIO(manager.connections)
+    return manager
+
+def connect(manager, sid, user_id, *rooms):
+    manager.connections.register(sid, user_id)
+    manager.socketio.sids.add(sid)
+    for room in (f'user_{user_id}',) + rooms:
+        manager.connections.add_room(sid, room)
+
+def deliver(manager, user_id, phone_number_id):
+    return manager._deliver(
+        'number_status_notification', user_id, phone_number_id,
+        lambda seq: {'seq': seq}
+    )
+
+def test_socket_in_user_and_phone_room_gets_one_copy():
+    manager = make_manager()
+    connect(manager, 'tab1', 1, 'phone_7')  # owner, watching its own number
+    connect(manager, 'tab2', 1)  # owner, user room only
+    connect(manager, 'other', 2, 'phone_7')  # another user watching the number
+
+    assert deliver(manager, 1, 7)
+
+    assert manager.socketio.deliveries == Counter({
+        ('tab1', 'number_status_notification'): 1,
+        ('tab2', 'number_status_notification'): 1,
+        ('other', 'number_status_notification'): 1
+    })
+
+def test_every_phone_room_socket_gets_one_copy_without_a_user():
+    manager = make_manager()
+    connect(manager, 'tab1', 1, 'phone_7')
+    connect(manager, 'other', 2, 'phone_7')
+    connect(manager, 'idle', 3)
+
+    assert deliver(manager, None, 7)
+
+    assert manager.socketio.deliveries == Counter({
+        ('tab1', 'number_status_notification'): 1,
+        ('other', 'number_status_notification'): 1
+    })
+
+def test_nothing_is_built_or_sent_for_empty_rooms():
+    manager = make_manager()
+    connect(manager, 'idle', 3)
+    built = []
+
+    delivered = manager._deliver(
+        'number_status_notification', 1, 7,
+        lambda seq: built.append(seq) or {'seq': seq}
+    )
+
+    assert not delivered
+    assert built == []
+    assert not manager.socketio.deliveries
+
+def test_queued_release_is_not_merged_into_the_next_assignment():
+    manager = make_manager()
+    manager.dispatcher = NotificationDispatcher()
+    manager.dispatcher.start(lambda run: None)  # drained by hand below
+    connect(manager, 'previous', 1)
+    connect(manager, 'next', 2)
+
+    manager.notify_number_status_change({'id': 7, 'user_id': 1, 'status': 'available'})
+    manager.notify_number_status_change({'id': 7, 'user_id': 2, 'status': 'assigned'})
+    manager.notify_number_status_change({'id': 7, 'user_id': 2, 'status': 'assigned'})
+    manager.dispatcher.stop()
+    manager.dispatcher._run()
+
+    assert manager.socketio.deliveries == Counter({
+        ('previous', 'number_status_notification'): 1,
+        ('next', 'number_status_notification'): 1
+    })
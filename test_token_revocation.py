@@ -0,0 +1,98 @@
+import os
+import time
+import uuid
+import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from src.utils.token_revocation import (
+    BloomFilter, MemoryRevocationBackend, RedisRevocationBackend, TokenRevocationStore, token_revocation
+)
+
+REDIS_URL = os.getenv('TEST_REDIS_URL')
+
+def make_store(backend=None, capacity=1000):
+    store = TokenRevocationStore()
+    store.capacity = capacity
+    store.backend = backend or MemoryRevocationBackend()
+    store.rebuild()
+    store.start(lambda run: run())  # rebuild inline when due
+    return store
+
+def jtis(count):
+    return [str(uuid.uuid4()) for _ in range(count)]
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.001)
+    keys = jtis(10000)
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(key in bloom for key in jtis(10000))
+    assert false_positives < 10000 * 0.001 * 3
+
+def test_revoked_jtis_survive_a_rebuild():
+    store = make_store()
+    revoked = jtis(2000)  # past capacity, so the next check rebuilds
+    expires_ts = time.time() + 3600
+    for jti in revoked:
+        store.revoke(jti, expires_ts)
+    store._rebuilt_at -= 2  # full-filter rebuilds wait a second after the last one
+
+    store.is_revoked('not-revoked')
+
+    assert store.get_stats()['bloom_bits'] > BloomFilter(1000, store.error_rate).size
+    assert all(store.is_revoked(jti) for jti in revoked)
+    assert not store.is_revoked('not-revoked')
+
+def test_revocation_during_a_rebuild_is_kept():
+    class RacingBackend(MemoryRevocationBackend):
+        def jtis(self):
+            found = super().jtis()
+            # Lands after the backend scan, before the new filter is swapped in
+            store.revoke('late', time.time() + 3600)
+            return found
+
+    store = make_store(RacingBackend())
+    store.revoke('early', time.time() + 3600)
+    store.rebuild()
+
+    assert store.is_revoked('early')
+    assert store.is_revoked('late')
+
+def test_expired_entries_are_swept():
+    backend = MemoryRevocationBackend()
+    store = make_store(backend)
+    store.revoke('expired', time.time() - 1)
+    store.revoke('live', time.time() + 3600)
+
+    assert not store.is_revoked('expired')
+    store.rebuild()
+
+    assert backend.jtis() == ['live']
+    assert store.get_stats()['bloom_entries'] == 1
+
+def test_revoked_token_is_rejected_by_blocklist_loader(client):
+    token = create_access_token(identity='1')
+    claims = decode_token(token)
+    token_revocation.revoke(claims['jti'], claims['exp'])
+
+    response = client.get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'TOKEN_REVOKED'
+
+@pytest.mark.skipif(not REDIS_URL, reason='set TEST_REDIS_URL to run against Redis')
+def test_redis_backend():
+    backend = RedisRevocationBackend(REDIS_URL)
+    backend.key_prefix = f'test:{uuid.uuid4()}:'
+    store = make_store(backend)
+    revoked = jtis(100)
+    for jti in revoked:
+        store.revoke(jti, time.time() + 60)
+
+    store.rebuild()
+
+    assert sorted(backend.jtis()) == sorted(revoked)
+    assert all(store.is_revoked(jti) for jti in revoked)
+    assert not store.is_revoked('not-revoked')
+    backend.client.delete(*(f'{backend.key_prefix}{jti}' for jti in revoked))
@@ -0,0 +1,80 @@
+import time
+import pytest
+from src.models.sms_provider import SMSProvider
+from src.models.user import db
+from src.utils.webhook_signatures import WebhookVerifier, body_signature, twilio_signature, vonage_signature
+
+# Vonage inbound SMS fields; the expected digests below follow Vonage's
+# signing steps (sorted "&key=value" pairs, then the secret for md5hash)
+VONAGE_PARAMS = {
+    'msisdn': '447700900001',
+    'to': '447700900000',
+    'messageId': '0A0000000123ABCD1',
+    'text': 'Hello world',
+    'type': 'text',
+    'keyword': 'HELLO',
+    'message-timestamp': '2020-01-01 12:00:00',
+    'timestamp': '1578787200',
+    'nonce': 'aaaaaaaa-bbbb-cccc-dddd-0123456789ab'
+}
+
+@pytest.fixture
+def verifier(app):
+    db.session.add(SMSProvider(name='nexmo', api_endpoint='https://rest.nexmo.com', is_active=True,
+                               configuration={'signature_secret': 'secret', 'signature_method': 'md5hash'}))
+    db.session.commit()
+    return WebhookVerifier(app)
+
+def signed_vonage_params(**overrides):
+    params = dict(VONAGE_PARAMS, timestamp=str(int(time.time())))
+    params.update(overrides)
+    params['sig'] = vonage_signature('secret', params)
+    return params
+
+def test_twilio_signature_matches_documented_example():
+    # Example from Twilio's "Webhooks security" guide
+    params = {
+        'CallSid': 'CA1234567890ABCDE',
+        'Caller': '+12349013030',
+        'Digits': '1234',
+        'From': '+12349013030',
+        'To': '+18005551212'
+    }
+
+    signature = twilio_signature('12345', 'https://mycompany.com/myapp.php?foo=1&bar=2', params)
+
+    assert signature == '0/KCTR6DLpKmkAf8muzZqo1nDgQ='
+
+def test_vonage_md5hash_signature():
+    assert vonage_signature('secret', VONAGE_PARAMS) == '371283c886dc10e6e19fccf5656f991e'
+    # sig itself is never part of the signed payload
+    assert vonage_signature('secret', dict(VONAGE_PARAMS, sig='x')) == '371283c886dc10e6e19fccf5656f991e'
+
+def test_vonage_hmac_signatures():
+    assert vonage_signature('secret', VONAGE_PARAMS, 'md5') == '4110e57d60731ffec3eb8f94184c3a23'
+    assert vonage_signature('secret', VONAGE_PARAMS, 'sha256') == (
+        '6d625f3b563d5072090d283d174267f17a95268a858ece1f50e5ca862bde0c12'
+    )
+
+def test_vonage_signature_escapes_separators():
+    assert vonage_signature('secret', {'text': 'a&b=c'}) == vonage_signature('secret', {'text': 'a_b_c'})
+
+def test_body_signature_matches_documented_example():
+    # Example from GitHub's "Validating webhook deliveries" guide
+    signature = body_signature("It's a Secret to Everybody", b'Hello, World!')
+
+    assert signature == 'sha256=757107ea0eb2509fc211221cce984b8a37570b6d7586c22c46f4379c8b043e17'
+
+def test_vonage_webhook_verifies(verifier):
+    params = signed_vonage_params()
+
+    assert verifier.verify('nexmo', None, params)[0]
+    assert not verifier.verify('nexmo', None, dict(params, text='tampered'))[0]
+
+def test_stale_vonage_timestamp_is_rejected(verifier):
+    params = signed_vonage_params(timestamp=str(int(time.time()) - verifier.max_skew - 60))
+
+    assert verifier.verify('nexmo', None, params) == (False, 'Stale timestamp')
+
+def test_unknown_provider_is_rejected(verifier):
+    assert verifier.verify('forged', None, {}) == (False, 'Unknown provider')
@@ -0,0 +1,255 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional for local development
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (no false negatives)"""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing over one 128-bit digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+class MemoryRevocationBackend:
+    """Process-local jti -> expiry set.
+
+    Revocations are only visible to the current process, so this backend is
+    meant for single-worker deployments, development and tests.
+    """
+
+    def __init__(self):
+        self._revoked = {}  # jti -> expiry epoch seconds
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_ts):
+        with self._lock:
+            self._revoked[jti] = expires_ts
+
+    def contains(self, jti):
+        with self._lock:
+            expires_ts = self._revoked.get(jti)
+            return expires_ts is not None and expires_ts > time.time()
+
+    def sweep(self):
+        """Drop entries whose tokens have expired anyway"""
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, expires_ts in self._revoked.items() if expires_ts <= now]
+            for jti in expired:
+                del self._revoked[jti]
+            return len(expired)
+
+    def jtis(self):
+        with self._lock:
+            return list(self._revoked)
+
+    def subscribe(self, callback):
+        pass
+
+class RedisRevocationBackend:
+    """Redis revocation set shared by every worker.
+
+    Entries expire with the token via native key TTLs. New revocations are
+    also published so each worker can add them to its local Bloom filter.
+    """
+
+    key_prefix = 'revoked:jti:'
+    channel = 'revoked:jti'
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError('The redis package is required for a redis:// token revocation store')
+        self.client = redis.Redis.from_url(url)
+        self._pubsub_thread = None
+
+    def add(self, jti, expires_ts):
+        self.client.set(f'{self.key_prefix}{jti}', 1, exat=max(int(math.ceil(expires_ts)), 1))
+        self.client.publish(self.channel, jti)
+
+    def contains(self, jti):
+        return bool(self.client.exists(f'{self.key_prefix}{jti}'))
+
+    def sweep(self):
+        return 0
+
+    def jtis(self):
+        offset = len(self.key_prefix)
+        return [key.decode()[offset:] for key in self.client.scan_iter(f'{self.key_prefix}*')]
+
+    def subscribe(self, callback):
+        """Call callback(jti) for revocations made by any worker"""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: lambda message: callback(message['data'].decode())})
+        self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+class TokenRevocationStore:
+    """Revoked JWT ids, checked on every JWT-protected request.
+
+    An in-process Bloom filter answers "definitely not revoked" for almost
+    every request without touching the backend; only Bloom hits (revoked
+    tokens and rare false positives) are confirmed against the exact set.
+    Entries live until the token's own expiry. The filter cannot delete, so
+    it is rebuilt from the backend every ``rebuild_interval`` seconds or
+    when it fills past capacity, which also drops expired jtis. Rebuilds
+    run as a background task; requests keep checking against the current
+    filter meanwhile.
+    """
+
+    def __init__(self, app=None):
+        self.capacity = 100000
+        self.error_rate = 0.001
+        self.rebuild_interval = 300
+        self.backend = MemoryRevocationBackend()
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._rebuilt_at = time.monotonic()
+        self._adds_during_rebuild = None
+        self._rebuild_scheduled = False
+        self._start_background_task = self._start_thread
+        self._stats = {
+            'checks': 0,
+            'bloom_negatives': 0,
+            'exact_lookups': 0,
+            'false_positives': 0,
+            'revoked': 0
+        }
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Select the backend from TOKEN_REVOCATION_URL (memory:// or redis://...)"""
+        self.capacity = app.config.get('TOKEN_REVOCATION_CAPACITY', self.capacity)
+        url = app.config.get('TOKEN_REVOCATION_URL', 'memory://')
+        if url.startswith('redis://') or url.startswith('rediss://'):
+            self.backend = RedisRevocationBackend(url)
+        else:
+            self.backend = MemoryRevocationBackend()
+        self.rebuild()
+        self.backend.subscribe(self._bloom_add)
+
+    def start(self, start_background_task):
+        """Run periodic rebuilds with the server's background task primitive"""
+        self._start_background_task = start_background_task
+
+    @staticmethod
+    def _start_thread(target):
+        threading.Thread(target=target, daemon=True).start()
+
+    def _schedule_rebuild(self):
+        with self._lock:
+            if self._rebuild_scheduled:
+                return
+            self._rebuild_scheduled = True
+        try:
+            self._start_background_task(self._run_rebuild)
+        except Exception as e:
+            logger.error(f'Token revocation rebuild could not start: {str(e)}')
+            self._rebuild_scheduled = False
+
+    def _run_rebuild(self):
+        try:
+            self.rebuild()
+        finally:
+            self._rebuild_scheduled = False
+
+    def _bloom_add(self, jti):
+        with self._lock:
+            self._bloom.add(jti)
+            if self._adds_during_rebuild is not None:
+                self._adds_during_rebuild.append(jti)
+
+    def rebuild(self):
+        """Sweep expired entries and rebuild the Bloom filter from the backend"""
+        with self._lock:
+            if self._adds_during_rebuild is not None:
+                return
+            self._adds_during_rebuild = []
+            self._rebuilt_at = time.monotonic()
+        try:
+            self.backend.sweep()
+            jtis = self.backend.jtis()
+        except Exception as e:
+            logger.error(f'Token revocation rebuild error: {str(e)}')
+            with self._lock:
+                self._adds_during_rebuild = None
+            return
+
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            # Revocations that raced the backend scan must not be lost
+            for jti in self._adds_during_rebuild:
+                bloom.add(jti)
+            self._adds_during_rebuild = None
+            self._bloom = bloom
+
+    def revoke(self, jti, expires_ts):
+        """Revoke a token id until its expiry (epoch seconds)"""
+        self.backend.add(jti, expires_ts)
+        self._bloom_add(jti)
+        self._stats['revoked'] += 1
+
+    def is_revoked(self, jti):
+        """Check a token id; fails closed if a Bloom hit cannot be confirmed"""
+        self._stats['checks'] += 1
+        bloom = self._bloom
+        age = time.monotonic() - self._rebuilt_at
+        # A full filter only loses precision, so a failing rebuild is retried at most once a second
+        if age > self.rebuild_interval or (bloom.count > bloom.capacity and age > 1.0):
+            self._schedule_rebuild()
+
+        if jti not in bloom:
+            self._stats['bloom_negatives'] += 1
+            return False
+
+        self._stats['exact_lookups'] += 1
+        try:
+            revoked = self.backend.contains(jti)
+        except Exception as e:
+            logger.error(f'Token revocation lookup error: {str(e)}')
+            return True
+        if not revoked:
+            self._stats['false_positives'] += 1
+        return revoked
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        stats['bloom_entries'] = self._bloom.count
+        stats['bloom_bits'] = self._bloom.size
+        stats['bloom_hashes'] = self._bloom.hash_count
+        return stats
+
+# Global token revocation store instance
+token_revocation = TokenRevocationStore()
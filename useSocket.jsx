@@ -3,9 +3,14 @@ import { io } from 'socket.io-client';
 import { useAuth } from './useAuth.jsx';
 import toast from 'react-hot-toast';
 
+// Sequence numbers are (epoch << 32) | counter, see replay_buffer.py
+const seqEpoch = (seq) => Math.floor(seq / 2 ** 32);
+
 export const useSocket = () => {
   const { token, authenticated } = useAuth();
   const socketRef = useRef(null);
+  // Latest notification sequence seen, sent on (re)connect for replay
+  const lastSeqRef = useRef(null);
   const [isConnected, setIsConnected] = useState(false);
   const [connectionError, setConnectionError] = useState(null);
 
@@ -22,9 +27,11 @@ export const useSocket = () => {
 
     // Create socket connection
     const socket = io(process.env.REACT_APP_API_URL || 'http://localhost:5000', {
-      auth: {
-        token: token
-      },
+      // Evaluated on every (re)connect so the server can replay missed events
+      auth: (cb) => cb({
+        token: token,
+        last_seq: lastSeqRef.current
+      }),
       transports: ['websocket', 'polling'],
       timeout: 20000,
       reconnection: true,
@@ -78,12 +85,35 @@ export const useSocket = () => {
     });
 
     // Application-specific event handlers
+    const trackSeq = (data) => {
+      if (!data || !data.seq) {
+        return;
+      }
+      // The high bits of a sequence are the emitting worker's epoch; numbers
+      // from different epochs are not comparable, so the newest one wins
+      const last = lastSeqRef.current;
+      if (last === null || seqEpoch(data.seq) !== seqEpoch(last) || data.seq > last) {
+        lastSeqRef.current = data.seq;
+      }
+    };
+
     socket.on('connected', (data) => {
       console.log('Socket authentication successful:', data);
+      if (lastSeqRef.current === null) {
+        lastSeqRef.current = data.seq;
+      }
+    });
+
+    socket.on('replay_complete', (data) => {
+      if (!data.complete) {
+        // Replay buffer rolled over: components refetch over REST
+        window.dispatchEvent(new CustomEvent('realtimeResync', { detail: data }));
+      }
     });
 
-    socket.on('message_notification', (data) => {
+    const handleMessageNotification = (data) => {
       console.log('New message notification:', data);
+      trackSeq(data);
       
       // Show toast notification
       const message = data.message;
@@ -99,10 +129,24 @@ export const useSocket = () => {
 
       // Trigger custom event for components to listen
       window.dispatchEvent(new CustomEvent('newMessage', { detail: data }));
+    };
+
+    socket.on('message_notification', handleMessageNotification);
+
+    // Bursts of notifications for one room arrive coalesced into a single batch
+    socket.on('message_batch', (batch) => {
+      batch.notifications.forEach(({ event, data }) => {
+        if (event === 'message_notification') {
+          handleMessageNotification(data);
+        } else if (event === 'number_status_notification') {
+          handleNumberStatusNotification(data);
+        }
+      });
     });
 
-    socket.on('number_status_notification', (data) => {
+    const handleNumberStatusNotification = (data) => {
       console.log('Number status notification:', data);
+      trackSeq(data);
       
       const phoneNumber = data.phone_number;
       const status = phoneNumber.status;
@@ -115,7 +159,9 @@ export const useSocket = () => {
 
       // Trigger custom event for components to listen
       window.dispatchEvent(new CustomEvent('numberStatusChange', { detail: data }));
-    });
+    };
+
+    socket.on('number_status_notification', handleNumberStatusNotification);
 
     socket.on('system_notification', (data) => {
       console.log('System notification:', data);
@@ -160,7 +206,10 @@ export const useSocket = () => {
   // Socket utility functions
   const joinPhoneRoom = (phoneNumberId) => {
     if (socketRef.current && isConnected) {
-      socketRef.current.emit('join_phone_room', { phone_number_id: phoneNumberId });
+      socketRef.current.emit('join_phone_room', {
+        phone_number_id: phoneNumberId,
+        last_seq: lastSeqRef.current
+      });
     }
   };
 
@@ -0,0 +1,110 @@
+from datetime import datetime
+import hashlib
+import time
+from src.models.user import db
+
+# How often expired sessions are swept, at most
+DEFAULT_SESSION_SWEEP_SECONDS = 3600
+
+def hash_token_id(jti):
+    """Hash a refresh token's jti for storage and lookup"""
+    return hashlib.sha256(jti.encode('utf-8')).hexdigest()
+
+class UserSession(db.Model):
+    """Issued refresh tokens, one row per login.
+
+    Only a SHA-256 of the refresh token's jti is stored. Each refresh
+    rotates the row to the new token's hash in one indexed UPDATE, so a
+    refresh token works exactly once. Expired rows are removed by a
+    periodic bulk DELETE on the expires_at index.
+    """
+
+    __tablename__ = 'user_sessions'
+    __table_args__ = (
+        db.Index('idx_user_sessions_user_id', 'user_id'),
+        db.Index('idx_user_sessions_expires_at', 'expires_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    ip_address = db.Column(db.String(45), nullable=True)
+    user_agent = db.Column(db.String(255), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    sweep_interval = DEFAULT_SESSION_SWEEP_SECONDS
+    _last_swept = None
+
+    def __repr__(self):
+        return f'<UserSession {self.id} user={self.user_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'ip_address': self.ip_address,
+            'user_agent': self.user_agent,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None
+        }
+
+    @classmethod
+    def create(cls, user_id, jti, expires_at, ip_address=None, user_agent=None):
+        """Record a newly issued refresh token (caller commits)"""
+        cls.sweep_if_due()
+        session = cls(
+            user_id=user_id,
+            token_hash=hash_token_id(jti),
+            ip_address=ip_address,
+            user_agent=user_agent[:255] if user_agent else None,
+            expires_at=expires_at
+        )
+        db.session.add(session)
+        return session
+
+    @classmethod
+    def rotate(cls, user_id, old_jti, new_jti, expires_at):
+        """Swap a live session to a new refresh token; False if old_jti is unknown, used or expired"""
+        now = datetime.utcnow()
+        rotated = cls.query.filter(
+            cls.token_hash == hash_token_id(old_jti),
+            cls.user_id == user_id,
+            cls.expires_at > now
+        ).update({
+            cls.token_hash: hash_token_id(new_jti),
+            cls.expires_at: expires_at,
+            cls.last_used_at: now
+        }, synchronize_session=False)
+        return rotated == 1
+
+    @classmethod
+    def revoke(cls, jti):
+        """End the session holding a refresh token"""
+        return cls.query.filter(cls.token_hash == hash_token_id(jti)).delete(synchronize_session=False)
+
+    @classmethod
+    def revoke_all(cls, user_id):
+        """End every session of a user in one statement"""
+        return cls.query.filter(cls.user_id == user_id).delete(synchronize_session=False)
+
+    @classmethod
+    def sweep_expired(cls):
+        """Bulk delete expired sessions"""
+        cls._last_swept = time.monotonic()
+        return cls.query.filter(cls.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+
+    @classmethod
+    def sweep_if_due(cls):
+        if cls._last_swept is None or time.monotonic() - cls._last_swept >= cls.sweep_interval:
+            return cls.sweep_expired()
+        return 0
+
+    @classmethod
+    def get_active_for_user(cls, user_id):
+        """Get a user's unexpired sessions, most recently used first"""
+        return cls.query.filter(
+            cls.user_id == user_id,
+            cls.expires_at > datetime.utcnow()
+        ).order_by(cls.last_used_at.desc()).all()
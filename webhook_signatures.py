@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Vonage signature methods and their hashlib digests; md5hash is a plain
+# md5 over the parameters followed by the secret
+VONAGE_SIGNATURE_METHODS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'sha512': hashlib.sha512
+}
+
+# Environment fallbacks when a provider's configuration has no secret
+ENV_SECRETS = {
+    'twilio': 'TWILIO_AUTH_TOKEN',
+    'nexmo': 'NEXMO_SIGNATURE_SECRET'
+}
+
+def twilio_signature(auth_token, url, params):
+    """X-Twilio-Signature: base64 HMAC-SHA1 of the URL plus sorted POST params"""
+    payload = url + ''.join(f'{key}{params[key]}' for key in sorted(params))
+    digest = hmac.new(auth_token.encode('utf-8'), payload.encode('utf-8'), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+def vonage_signature(secret, params, method='md5hash'):
+    """Vonage signed webhook `sig` over the sorted params (excluding sig)"""
+    if method == 'md5hash':
+        hasher = hashlib.md5()
+    else:
+        hasher = hmac.new(secret.encode('utf-8'), digestmod=VONAGE_SIGNATURE_METHODS[method])
+    for key in sorted(params):
+        if key == 'sig':
+            continue
+        value = str(params[key]).replace('&', '_').replace('=', '_')
+        hasher.update(f'&{key}={value}'.encode('utf-8'))
+    if method == 'md5hash':
+        hasher.update(secret.encode('utf-8'))
+    return hasher.hexdigest()
+
+def body_signature(secret, body):
+    """Generic providers: sha256=<hex HMAC-SHA256 of the raw body>"""
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+class WebhookVerifier:
+    """Signature checks for incoming provider webhooks.
+
+    Runs before any webhook database work, so a forged request costs one
+    HMAC. Secrets come from each provider's configuration (auth_token for
+    Twilio, signature_secret/signature_method for Vonage, webhook_secret
+    for other providers), with TWILIO_AUTH_TOKEN / NEXMO_SIGNATURE_SECRET
+    as fallbacks. The whole registry is loaded in one query and cached for
+    ``ttl`` seconds, so unknown provider names never reach the database;
+    the rate limiter reads per-provider limits from the same registry.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.ttl = 300
+        self.max_skew = 300
+        self.base_url = None
+        self._lock = threading.Lock()
+        self._providers = {}  # provider name -> {'secret', 'method', 'rate_limit_per_minute'}
+        self._loaded_at = None
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('WEBHOOK_VERIFY_SIGNATURES', True)
+        self.ttl = app.config.get('WEBHOOK_SECRET_CACHE_SECONDS', self.ttl)
+        self.base_url = app.config.get('WEBHOOK_BASE_URL') or None
+
+    def _load(self):
+        from src.models.sms_provider import SMSProvider
+
+        providers = {}
+        for provider in SMSProvider.query.filter_by(is_active=True).all():
+            name = provider.name.lower()
+            configuration = provider.configuration or {}
+            if name == 'twilio':
+                secret = configuration.get('auth_token')
+            elif name == 'nexmo':
+                secret = configuration.get('signature_secret')
+            else:
+                secret = configuration.get('webhook_secret')
+            secret = secret or os.getenv(ENV_SECRETS.get(name, ''), '')
+            providers[name] = {
+                'secret': secret,
+                'method': configuration.get('signature_method', 'md5hash'),
+                'rate_limit_per_minute': provider.rate_limit_per_minute
+            }
+        return providers
+
+    def get_provider(self, provider_name):
+        """Get {'secret', 'method', 'rate_limit_per_minute'} for an active provider, or None"""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.ttl:
+            with self._lock:
+                if self._loaded_at is None or now - self._loaded_at >= self.ttl:
+                    try:
+                        self._providers = self._load()
+                    except Exception as e:
+                        # Keep verifying with the last known secrets while the database is down
+                        if self._loaded_at is None:
+                            raise
+                        logger.error(f'Error reloading webhook secrets: {str(e)}')
+                    self._loaded_at = now
+        return self._providers.get(provider_name)
+
+    def invalidate(self):
+        """Reload provider secrets on the next request"""
+        self._loaded_at = None
+
+    def verify(self, provider_name, request, params):
+        """Check a webhook request; returns (ok, reason)"""
+        if not self.enabled:
+            return True, 'Verification disabled'
+
+        entry = self.get_provider(provider_name)
+        if entry is None:
+            return False, 'Unknown provider'
+        if not entry['secret']:
+            return False, 'No signing secret configured'
+
+        if provider_name == 'twilio':
+            signature = request.headers.get('X-Twilio-Signature', '')
+            url = self.base_url.rstrip('/') + request.full_path if self.base_url else request.url
+            expected = twilio_signature(entry['secret'], url, params)
+            return self._matches(signature, expected), 'Invalid signature'
+
+        if provider_name == 'nexmo':
+            method = entry['method']
+            if method != 'md5hash' and method not in VONAGE_SIGNATURE_METHODS:
+                return False, f'Unsupported signature method: {method}'
+            try:
+                skew = abs(time.time() - int(params.get('timestamp', 0)))
+            except (TypeError, ValueError):
+                return False, 'Invalid timestamp'
+            if skew > self.max_skew:
+                return False, 'Stale timestamp'
+            signature = str(params.get('sig', '')).lower()
+            expected = vonage_signature(entry['secret'], params, method)
+            return self._matches(signature, expected), 'Invalid signature'
+
+        signature = request.headers.get('X-Signature', '')
+        expected = body_signature(entry['secret'], request.get_data(cache=True))
+        return self._matches(signature, expected), 'Invalid signature'
+
+    @staticmethod
+    def _matches(signature, expected):
+        # Constant-time; bytes so non-ASCII header values compare instead of raising
+        return hmac.compare_digest(signature.encode('utf-8'), expected.encode('utf-8'))
+
+# Global webhook verifier instance
+webhook_verifier = WebhookVerifier()
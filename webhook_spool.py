@@ -0,0 +1,348 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+import click
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.seg'
+CHECKPOINT_SUFFIX = '.ckpt'
+
+def encode_record(record):
+    """One spool line: 8 hex digit CRC32 of the JSON, a space, the JSON"""
+    body = json.dumps(record, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return b'%08x ' % zlib.crc32(body) + body + b'\n'
+
+def read_records(path, offset=0):
+    """Yield (offset, next_offset, record) from a segment.
+
+    A torn or corrupt line (from a crash mid-write) ends the segment; it
+    was never fsynced, so it was never acknowledged.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            next_offset = offset + len(line)
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('incomplete line')
+                crc, body = line[:8], line[9:-1]
+                if int(crc, 16) != zlib.crc32(body):
+                    raise ValueError('checksum mismatch')
+                record = json.loads(body)
+            except ValueError:
+                logger.error(f'Corrupt spool record in {path} at offset {offset}; skipping rest of segment')
+                return
+            yield offset, next_offset, record
+            offset = next_offset
+
+def read_checkpoint(path):
+    try:
+        with open(path + CHECKPOINT_SUFFIX) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+def write_checkpoint(path, offset):
+    # Not fsynced: after a crash a few records are replayed again, which
+    # the idempotent handler absorbs
+    tmp = path + CHECKPOINT_SUFFIX + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(str(offset))
+    os.replace(tmp, path + CHECKPOINT_SUFFIX)
+
+def fsync_directory(path):
+    """Flush a directory's entries, so a file created in it survives a crash"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class WebhookSpool:
+    """Crash-safe append-only spool for webhooks that could not be persisted.
+
+    Records go to segment files in SPOOL_DIR, one CRC-checked JSON line
+    each. append() returns only after the record is fsynced; concurrent
+    appends share fsyncs (group commit), so a burst costs a handful of
+    disk flushes rather than one per webhook. The active segment is held
+    under an exclusive flock and sealed when it reaches
+    ``segment_bytes`` or sits idle for ``seal_after`` seconds.
+
+    A replay worker drains sealed segments oldest first at ``rate``
+    records per second through the webhook handler, checkpointing its
+    offset, backing off while the database is still failing, and
+    deleting each segment once drained. Segments are claimed with flock,
+    so several workers sharing a spool directory never replay the same
+    segment, and segments left by a crashed worker are picked up.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.directory = 'spool/webhooks'
+        self.segment_bytes = 16 * 1024 * 1024
+        self.seal_after = 5.0
+        self.rate = 20.0
+        self.max_backoff = 60.0
+        self.app = None
+        self.handler = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+        self._path = None
+        self._opened_at = None
+        self._last_append = None
+        self._counter = 0
+        self._written = 0
+        self._synced = 0
+        self._running = False
+        self._sleep = time.sleep
+        self._stats = {
+            'appended': 0,
+            'fsyncs': 0,
+            'replayed': 0,
+            'duplicates': 0,
+            'rejected': 0,
+            'replay_errors': 0,
+            'segments_drained': 0
+        }
+
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app, handler=None):
+        """Configure the spool.
+
+        handler(provider_name, webhook_data, spooled_at) replays one record
+        and returns (success, message), with success None for an already
+        stored message.
+        """
+        self.app = app
+        self.handler = handler
+        self.enabled = app.config.get('SPOOL_ENABLED', True)
+        self.directory = app.config.get('SPOOL_DIR', self.directory)
+        self.segment_bytes = app.config.get('SPOOL_SEGMENT_BYTES', self.segment_bytes)
+        self.rate = app.config.get('SPOOL_REPLAY_RATE', self.rate)
+        app.cli.add_command(spool_cli)
+
+    # Writing
+
+    def _segment_paths(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in names if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._counter += 1
+        # Millisecond prefix keeps segments from every process in arrival order
+        name = f'{int(time.time() * 1000):013d}-{os.getpid()}-{self._counter:06d}{SEGMENT_SUFFIX}'
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, 'ab')
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        # fsyncing the segment alone does not persist its directory entry
+        fsync_directory(self.directory)
+        self._opened_at = time.monotonic()
+
+    def _seal(self):
+        """Close the active segment, making it available for replay (caller holds _lock)"""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced = self._written
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+        self._path = None
+
+    def append(self, provider_name, webhook_data):
+        """Durably record a webhook; returns once it is on disk"""
+        line = encode_record({
+            'provider': provider_name,
+            'data': webhook_data,
+            'spooled_at': time.time()
+        })
+
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(line)
+            self._file.flush()
+            self._written += 1
+            position = self._written
+            self._last_append = time.monotonic()
+            if self._file.tell() >= self.segment_bytes:
+                self._seal()
+            self._stats['appended'] += 1
+
+        self._sync(position)
+
+    def _sync(self, position):
+        # Whoever gets the sync lock flushes every record written so far
+        with self._sync_lock:
+            if self._synced >= position:
+                return
+            with self._lock:
+                if self._file is None:
+                    return
+                target = self._written
+                fd = os.dup(self._file.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._synced = max(self._synced, target)
+            self._stats['fsyncs'] += 1
+
+    def seal_if_idle(self):
+        """Seal the active segment once it has gone quiet so it can be replayed"""
+        with self._lock:
+            if (self._file is not None and self._last_append is not None
+                    and time.monotonic() - self._last_append >= self.seal_after):
+                self._seal()
+
+    # Replay
+
+    def start(self, start_background_task, sleep):
+        """Start the replay worker using the server's background task primitive"""
+        if not self.enabled or self._running or self.handler is None:
+            return
+        self._running = True
+        self._sleep = sleep
+        start_background_task(self._run)
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        backoff = 1.0
+        while self._running:
+            self.seal_if_idle()
+            try:
+                drained = self.replay_pending()
+                backoff = 1.0
+            except Exception as e:
+                self._stats['replay_errors'] += 1
+                logger.warning(f'Spool replay paused for {backoff:.0f}s: {str(e)}')
+                self._sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            if not drained:
+                self._sleep(1.0)
+
+    def replay_pending(self, paths=None):
+        """Replay every sealed segment we can claim; returns records replayed.
+
+        Raises on the first record that fails with an exception, leaving
+        the checkpoint at that record.
+        """
+        total = 0
+        for path in (paths or self._segment_paths()):
+            if path == self._path:
+                continue
+            total += self.replay_segment(path)
+        return total
+
+    def replay_segment(self, path):
+        """Claim, replay and delete one segment; 0 if another process holds it"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            if not os.path.exists(path):
+                return 0  # drained by another process while we waited
+
+            count = 0
+            interval = 1.0 / self.rate if self.rate else 0
+            for offset, next_offset, record in read_records(path, read_checkpoint(path)):
+                self._replay_record(record)
+                write_checkpoint(path, next_offset)
+                count += 1
+                if interval:
+                    self._sleep(interval)
+
+            os.remove(path)
+            try:
+                os.remove(path + CHECKPOINT_SUFFIX)
+            except FileNotFoundError:
+                pass
+            self._stats['segments_drained'] += 1
+            return count
+
+    def _replay_record(self, record):
+        with self.app.app_context():
+            success, message = self.handler(record['provider'], record['data'], record.get('spooled_at'))
+        if success is None:
+            self._stats['duplicates'] += 1
+        elif success:
+            self._stats['replayed'] += 1
+        else:
+            # Permanently unprocessable (e.g. provider removed); retrying won't help
+            self._stats['rejected'] += 1
+            logger.error(f'Dropping spooled webhook from {record["provider"]}: {message}')
+
+    def get_stats(self):
+        """Get counters plus the pending segment count and size"""
+        paths = self._segment_paths()
+        pending_bytes = 0
+        for path in paths:
+            try:
+                pending_bytes += os.path.getsize(path) - read_checkpoint(path)
+            except OSError:
+                pass
+        stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['pending_segments'] = len(paths)
+        stats['pending_bytes'] = pending_bytes
+        stats['replay_running'] = self._running
+        return stats
+
+# Global webhook spool instance
+webhook_spool = WebhookSpool()
+
+@click.group('spool')
+def spool_cli():
+    """Inspect and replay the webhook spool."""
+
+@spool_cli.command('list')
+def spool_list():
+    """List spool segments with record counts and replay progress."""
+    for path in webhook_spool._segment_paths():
+        records = sum(1 for _ in read_records(path))
+        pending = sum(1 for _ in read_records(path, read_checkpoint(path)))
+        click.echo(f'{os.path.basename(path)}  {os.path.getsize(path)} bytes  {records} records  {records - pending} replayed')
+
+@spool_cli.command('show')
+@click.argument('segment')
+def spool_show(segment):
+    """Print the records of a segment as JSON lines."""
+    path = segment if os.path.sep in segment else os.path.join(webhook_spool.directory, segment)
+    for offset, _, record in read_records(path):
+        click.echo(f'{offset}\t{json.dumps(record, sort_keys=True)}')
+
+@spool_cli.command('replay')
+@click.argument('segments', nargs=-1)
+def spool_replay(segments):
+    """Replay sealed segments now (all if none are given)."""
+    paths = [
+        segment if os.path.sep in segment else os.path.join(webhook_spool.directory, segment)
+        for segment in segments
+    ] or None
+    count = webhook_spool.replay_pending(paths)
+    click.echo(f'Replayed {count} records')
+    click.echo(json.dumps(webhook_spool.get_stats(), indent=2))
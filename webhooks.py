@@ -1,11 +1,19 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
 import logging
+import time
+from sqlalchemy.exc import SQLAlchemyError
 from src.models.message import Message
 from src.models.phone_number import PhoneNumber
 from src.models.sms_provider import SMSProvider
+from src.models.recipient_cache import unknown_recipients
 from src.models.user import db
 from src.realtime.socket_manager import socket_manager
+from src.utils.webhook_signatures import webhook_verifier
+from src.utils.webhook_spool import webhook_spool
+from src.utils.flood_guard import flood_guard, SUMMARIZE, DROP
+from src.utils.heavy_hitters import traffic_sketches
+from src.utils.ingest_series import ingest_series, RESOLUTIONS
 
 webhooks_bp = Blueprint('webhooks', __name__)
 
@@ -40,15 +48,15 @@ def normalize_phone_number(phone_number):
     
     return normalized
 
-def process_sms_webhook(provider_name, webhook_data):
-    """Process incoming SMS webhook from any provider"""
+def process_sms_webhook(provider_name, webhook_data, replay=False, spooled_at=None):
+    """Process incoming SMS webhook from any provider.
+
+    Database errors are raised so the caller can spool the webhook. With
+    replay=True a message already stored under its provider_message_id
+    returns (None, ...) instead of being inserted again, and the flood
+    policy is applied as of spooled_at.
+    """
     try:
-        # Get provider configuration
-        provider = SMSProvider.query.filter_by(name=provider_name, is_active=True).first()
-        if not provider:
-            logger.error(f'Provider {provider_name} not found or inactive')
-            return False, f'Provider {provider_name} not configured'
-        
         # Extract message data based on provider
         if provider_name.lower() == 'twilio':
             sender_number = normalize_phone_number(webhook_data.get('From', ''))
@@ -72,11 +80,41 @@ def process_sms_webhook(provider_name, webhook_data):
         if not all([sender_number, recipient_number, message_content]):
             return False, 'Missing required message data'
         
+        if not replay:
+            traffic_sketches.record(sender_number, recipient_number, provider_name)
+        
+        # Numbers we don't host are acked as handled: failing would make the
+        # provider retry, and each retry would repeat the lookup
+        if unknown_recipients.contains(recipient_number):
+            unknown_recipients.record_ack()
+            return True, f'Phone number {recipient_number} not registered'
+        
+        # Throttle senders flooding a number before any insert or notification;
+        # replayed webhooks are judged by when they arrived
+        received_at = (spooled_at or time.time()) if replay else None
+        flood_action = flood_guard.check(sender_number, recipient_number, received_at)
+        if flood_action == DROP:
+            return True, f'Flood message from {sender_number} suppressed'
+        if flood_action == SUMMARIZE:
+            logger.warning(f'Sender {sender_number} is flooding {recipient_number}; suppressing')
+            message_content = flood_guard.summary_text(sender_number)
+        
+        # Get provider configuration
+        provider = SMSProvider.query.filter_by(name=provider_name, is_active=True).first()
+        if not provider:
+            logger.error(f'Provider {provider_name} not found or inactive')
+            return False, f'Provider {provider_name} not configured'
+        
+        if replay and provider_message_id and Message.exists_from_provider(provider.id, provider_message_id):
+            return None, f'Message {provider_message_id} already stored'
+        
         # Find the phone number in our system
         phone_number = PhoneNumber.query.filter_by(phone_number=recipient_number).first()
         if not phone_number:
             logger.warning(f'Phone number {recipient_number} not found in system')
-            return False, f'Phone number {recipient_number} not registered'
+            unknown_recipients.add(recipient_number)
+            unknown_recipients.record_ack()
+            return True, f'Phone number {recipient_number} not registered'
         
         # Create message record
         message = Message.create_from_webhook(
@@ -103,12 +141,15 @@ def process_sms_webhook(provider_name, webhook_data):
                 'is_read': message.is_read
             }
             socket_manager.notify_new_message(message_data)
-            logger.info(f'Real-time notification sent for message {message.id}')
+            logger.info(f'Real-time notification queued for message {message.id}')
         except Exception as e:
             logger.error(f'Failed to send real-time notification: {str(e)}')
         
         return True, f'Message processed successfully: {message.id}'
         
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
     except Exception as e:
         logger.error(f'Error processing webhook from {provider_name}: {str(e)}')
         return False, f'Error processing webhook: {str(e)}'
@@ -124,6 +165,9 @@ def receive_sms_webhook():
                 'error': 'Missing provider parameter'
             }), 400
         
+        # Keep the raw body available for body-signed providers once the form is parsed
+        request.get_data(cache=True)
+        
         # Get webhook data
         if request.content_type == 'application/x-www-form-urlencoded':
             webhook_data = request.form.to_dict()
@@ -132,6 +176,14 @@ def receive_sms_webhook():
         else:
             webhook_data = request.form.to_dict()
         
+        # Reject forged requests before any database work
+        is_signed, error_msg = webhook_verifier.verify(provider_name, request, webhook_data)
+        if not is_signed:
+            logger.warning(f'Rejected webhook from {provider_name}: {error_msg}')
+            return jsonify({
+                'error': 'Invalid webhook signature'
+            }), 403
+        
         logger.info(f'Received webhook from {provider_name}: {webhook_data}')
         
         # Validate webhook data based on provider
@@ -150,8 +202,22 @@ def receive_sms_webhook():
                 'error': f'Invalid webhook data: {error_msg}'
             }), 400
         
-        # Process the webhook
-        success, message = process_sms_webhook(provider_name, webhook_data)
+        # Process the webhook; if the database is failing, spool it durably and
+        # ack so the provider doesn't retry into the outage. Spooled webhooks
+        # count as ingest failures since they were not stored on arrival.
+        started = time.perf_counter()
+        failed = True
+        try:
+            success, message = process_sms_webhook(provider_name, webhook_data)
+            failed = not success
+        except SQLAlchemyError as e:
+            if not webhook_spool.enabled:
+                raise
+            webhook_spool.append(provider_name, webhook_data)
+            logger.warning(f'Spooled webhook from {provider_name} after database error: {str(e)}')
+            success, message = True, 'Spooled for replay'
+        finally:
+            ingest_series.record(provider_name, failed, time.perf_counter() - started)
         
         if success:
             # Return appropriate response based on provider
@@ -171,6 +237,10 @@ def receive_sms_webhook():
             'error': 'Internal server error'
         }), 500
 
+def replay_spooled_webhook(provider_name, webhook_data, spooled_at=None):
+    """Spool replay handler: process a webhook that was spooled during an outage"""
+    return process_sms_webhook(provider_name, webhook_data, replay=True, spooled_at=spooled_at)
+
 @webhooks_bp.route('/webhooks/delivery', methods=['POST'])
 def receive_delivery_webhook():
     """Receive delivery status webhook from providers"""
@@ -181,6 +251,9 @@ def receive_delivery_webhook():
                 'error': 'Missing provider parameter'
             }), 400
         
+        # Keep the raw body available for body-signed providers once the form is parsed
+        request.get_data(cache=True)
+        
         # Get webhook data
         if request.content_type == 'application/x-www-form-urlencoded':
             webhook_data = request.form.to_dict()
@@ -251,6 +324,14 @@ def webhook_status():
         # Get active providers
         providers = SMSProvider.get_active_providers()
         
+        # Ingest time series, optionally limited (?resolution=1s,1m)
+        resolutions = [name for name in request.args.get('resolution', '').split(',') if name]
+        invalid = [name for name in resolutions if name not in RESOLUTIONS]
+        if invalid:
+            return jsonify({
+                'error': f'Invalid resolution: {", ".join(invalid)}; expected one of {", ".join(RESOLUTIONS)}'
+            }), 400
+        
         webhook_info = {
             'status': 'active',
             'endpoints': {
@@ -269,7 +350,11 @@ def webhook_status():
             'supported_content_types': [
                 'application/x-www-form-urlencoded',
                 'application/json'
-            ]
+            ],
+            'unknown_recipients': unknown_recipients.get_stats(),
+            'spool': webhook_spool.get_stats(),
+            'flood': flood_guard.get_stats(),
+            'ingest': ingest_series.snapshot(resolutions or None)
         }
         
         return jsonify(webhook_info), 200